@@ -1,12 +1,17 @@
 import asyncio
+import importlib
 import sys
+from typing import TYPE_CHECKING
 
-from . import server
-from . import top_queries
+if TYPE_CHECKING:
+    from . import server
+    from . import top_queries
 
 
 def main():
     """Main entry point for the package."""
+    from . import server
+
     # As of version 3.3.0 Psycopg on Windows is not compatible with the default
     # ProactorEventLoop.
     # See: https://www.psycopg.org/psycopg3/docs/advanced/async.html#async
@@ -16,6 +21,13 @@ def main():
     asyncio.run(server.main())
 
 
+def __getattr__(name: str):
+    # Import heavy submodules on first access so package import stays cheap
+    if name in ("server", "top_queries"):
+        return importlib.import_module(f".{name}", __name__)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
 # Optionally expose other important items at package level
 __all__ = [
     "main",
@@ -11,6 +11,9 @@ from attrs import field
 # Return 1000000.0 to indicate infinite improvement.
 INFINITE_IMPROVEMENT_MULTIPLIER = 1000000.0
 
+# Precomputed indentation strings for plan tree formatting.
+_PLAN_INDENTS = ["  " * depth for depth in range(64)]
+
 
 class ErrorResult:
     """Simple error result class."""
@@ -136,49 +139,50 @@ class ExplainPlanArtifact:
 
     @staticmethod
     def _format_plan_node(node: PlanNode, level: int = 0) -> str:
-        """Recursively format a plan node and its children.
+        """Format a plan node and its children.
 
         Args:
             node: The plan node to format
-            level: The current indentation level
+            level: The indentation level of the root node
 
         Returns:
             str: A formatted string representation of the node and its children
         """
-        indent = "  " * level
-        output = f"{indent}→ {node.node_type} (Cost: {node.startup_cost:.2f}..{node.total_cost:.2f})"
-
-        # Add table name if present
-        if node.relation_name:
-            output += f" on {node.relation_name}"
-
-        # Add rows information
-        output += f" [Rows: {node.plan_rows}]"
-
-        # Add actual metrics if available in a compact form
-        if node.actual_total_time is not None:
-            output += (
-                f" [Actual: {node.actual_startup_time:.2f}..{node.actual_total_time:.2f} ms, Rows: {node.actual_rows}, Loops: {node.actual_loops}]"
+        lines: list[str] = []
+        # Walk the tree with an explicit stack instead of recursing per node
+        stack = [(node, level)]
+        while stack:
+            current, depth = stack.pop()
+            indent = _PLAN_INDENTS[depth] if depth < len(_PLAN_INDENTS) else "  " * depth
+            relation = f" on {current.relation_name}" if current.relation_name else ""
+            actual = (
+                f" [Actual: {current.actual_startup_time:.2f}..{current.actual_total_time:.2f} ms, "
+                f"Rows: {current.actual_rows}, Loops: {current.actual_loops}]"
+                if current.actual_total_time is not None
+                else ""
             )
+            cost = f"{current.startup_cost:.2f}..{current.total_cost:.2f}"
+            lines.append(f"{indent}→ {current.node_type} (Cost: {cost}){relation} [Rows: {current.plan_rows}]{actual}")
+
+            # Add filter if present
+            if current.filter:
+                filter_text = current.filter
+                # Truncate long filters for readability
+                if len(filter_text) > 100:
+                    filter_text = filter_text[:97] + "..."
+                lines.append(f"{indent}  Filter: {filter_text}")
+
+            # Add buffer information if available in a compact form
+            if current.shared_hit_blocks is not None:
+                lines.append(
+                    f"{indent}  Buffers - hit: {current.shared_hit_blocks}, read: {current.shared_read_blocks}, "
+                    f"written: {current.shared_written_blocks}"
+                )
 
-        # Add filter if present
-        if node.filter:
-            filter_text = node.filter
-            # Truncate long filters for readability
-            if len(filter_text) > 100:
-                filter_text = filter_text[:97] + "..."
-            output += f"\n{indent}  Filter: {filter_text}"
-
-        # Add buffer information if available in a compact form
-        if node.shared_hit_blocks is not None:
-            output += f"\n{indent}  Buffers - hit: {node.shared_hit_blocks}, read: {node.shared_read_blocks}, written: {node.shared_written_blocks}"
-
-        # Recursively format children
-        if node.children:
-            for child in node.children:
-                output += "\n" + ExplainPlanArtifact._format_plan_node(child, level + 1)
+            # Push children in reverse so they are formatted in order
+            stack.extend((child, depth + 1) for child in reversed(current.children))
 
-        return output
+        return "\n".join(lines)
 
     @classmethod
     def from_json_data(cls, plan_data: dict[str, Any]) -> "ExplainPlanArtifact":
@@ -199,6 +203,12 @@ class ExplainPlanArtifact:
             execution_time=execution_time,
         )
 
+    @staticmethod
+    def _format_plan_data(plan_data: dict[str, Any]) -> tuple[PlanNode, str]:
+        """Build the plan tree for raw plan data and format it as text."""
+        plan_tree = PlanNode.from_json_data(plan_data["Plan"])
+        return plan_tree, ExplainPlanArtifact._format_plan_node(plan_tree)
+
     @staticmethod
     def format_plan_summary(plan_data):
         """Extract and format key information from a raw plan data."""
@@ -206,14 +216,9 @@ class ExplainPlanArtifact:
             return "No plan data available"
 
         try:
-            # Create a PlanNode from the raw JSON data
             if "Plan" in plan_data:
-                plan_node = PlanNode.from_json_data(plan_data["Plan"])
-
-                # Use _format_plan_node to format the output
-                plan_tree = ExplainPlanArtifact._format_plan_node(plan_node, 0)
-
-                return f"{plan_tree}"
+                _plan_tree, plan_text = ExplainPlanArtifact._format_plan_data(plan_data)
+                return plan_text
             else:
                 return "Invalid plan data (missing Plan field)"
 
@@ -235,16 +240,14 @@ class ExplainPlanArtifact:
             return "Cannot generate diff: Missing plan data"
 
         try:
-            # Create PlanNode objects from the plans
-            before_tree = PlanNode.from_json_data(before_plan["Plan"]) if "Plan" in before_plan else None
-            after_tree = PlanNode.from_json_data(after_plan["Plan"]) if "Plan" in after_plan else None
-
-            if not before_tree or not after_tree:
+            if "Plan" not in before_plan or "Plan" not in after_plan:
                 return "Cannot generate diff: Invalid plan structure"
 
-            # Format the plans as text
-            before_lines = ExplainPlanArtifact._format_plan_node(before_tree).split("\n")
-            after_lines = ExplainPlanArtifact._format_plan_node(after_tree).split("\n")
+            # Create PlanNode objects from the plans and format them as text
+            before_tree, before_text = ExplainPlanArtifact._format_plan_data(before_plan)
+            after_tree, after_text = ExplainPlanArtifact._format_plan_data(after_plan)
+            before_lines = before_text.splitlines()
+            after_lines = after_text.splitlines()
 
             # Generate a readable diff with context
             diff_lines = []
@@ -278,8 +281,9 @@ class ExplainPlanArtifact:
             before_structure = extract_node_types(before_tree)
             after_structure = extract_node_types(after_tree)
 
-            # Generate the structural diff
-            structure_diff = list(
+            # Stream the structural diff straight into the output
+            diff_start = len(diff_lines)
+            diff_lines.extend(
                 difflib.unified_diff(
                     before_structure,
                     after_structure,
@@ -287,11 +291,7 @@ class ExplainPlanArtifact:
                     lineterm="",
                 )
             )
-
-            # Add structural diff to output
-            if structure_diff:
-                diff_lines.extend(structure_diff)
-            else:
+            if len(diff_lines) == diff_start:
                 diff_lines.append("No structural changes detected")
 
             # Add more specific details about key changes
@@ -306,16 +306,16 @@ class ExplainPlanArtifact:
                 diff_lines.append(f"- Root operation changed: {before_tree.node_type} → {after_tree.node_type}")
 
             # Compare scan methods used
-            before_scans = [line for line in before_lines if "Seq Scan" in line]
-            after_scans = [line for line in after_lines if "Seq Scan" in line]
-            if len(before_scans) > len(after_scans):
-                diff_lines.append(f"- {len(before_scans) - len(after_scans)} sequential scans replaced with more efficient access methods")
+            before_scans = sum(1 for line in before_lines if "Seq Scan" in line)
+            after_scans = sum(1 for line in after_lines if "Seq Scan" in line)
+            if before_scans > after_scans:
+                diff_lines.append(f"- {before_scans - after_scans} sequential scans replaced with more efficient access methods")
 
             # Look for new index scans
-            before_idx_scans = [line for line in before_lines if "Index Scan" in line]
-            after_idx_scans = [line for line in after_lines if "Index Scan" in line]
-            if len(after_idx_scans) > len(before_idx_scans):
-                diff_lines.append(f"- {len(after_idx_scans) - len(before_idx_scans)} new index scans used")
+            before_idx_scans = sum(1 for line in before_lines if "Index Scan" in line)
+            after_idx_scans = sum(1 for line in after_lines if "Index Scan" in line)
+            if after_idx_scans > before_idx_scans:
+                diff_lines.append(f"- {after_idx_scans - before_idx_scans} new index scans used")
 
             return "\n".join(diff_lines)
 
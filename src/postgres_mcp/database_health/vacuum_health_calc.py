@@ -3,6 +3,26 @@ from dataclasses import dataclass
 from ..sql import SafeSqlDriver
 from ..sql import SqlDriver
 
+TRANSACTION_ID_METRICS_QUERY = """
+    SELECT schema, "table", transactions_left
+    FROM (
+        SELECT
+            n.nspname AS schema,
+            c.relname AS table,
+            {} - GREATEST(AGE(c.relfrozenxid), AGE(t.relfrozenxid)) AS transactions_left
+        FROM
+            pg_class c
+        INNER JOIN
+            pg_catalog.pg_namespace n ON n.oid = c.relnamespace
+        LEFT JOIN
+            pg_class t ON c.reltoastrelid = t.oid
+        WHERE
+            c.relkind = 'r'
+    ) AS xid_ages
+    WHERE transactions_left < {}
+    ORDER BY 3, 1, 2
+"""
+
 
 @dataclass
 class TransactionIdMetrics:
@@ -30,9 +50,7 @@ class VacuumHealthCalc:
         if not metrics:
             return "No tables found with transaction ID wraparound danger."
 
-        # Sort by transactions left ascending to show most critical first
-        metrics.sort(key=lambda x: x.transactions_left)
-
+        # The query returns tables most critical first, so no sorting is needed here
         unhealthy = [m for m in metrics if not m.is_healthy]
         if not unhealthy:
             return "All tables have healthy transaction ID age."
@@ -49,39 +67,21 @@ class VacuumHealthCalc:
         """Get transaction ID metrics for all tables."""
         results = await SafeSqlDriver.execute_param_query(
             self.sql_driver,
-            """
-            SELECT
-                n.nspname AS schema,
-                c.relname AS table,
-                {} - GREATEST(AGE(c.relfrozenxid), AGE(t.relfrozenxid)) AS transactions_left
-            FROM
-                pg_class c
-            INNER JOIN
-                pg_catalog.pg_namespace n ON n.oid = c.relnamespace
-            LEFT JOIN
-                pg_class t ON c.reltoastrelid = t.oid
-            WHERE
-                c.relkind = 'r'
-                AND ({} - GREATEST(AGE(c.relfrozenxid), AGE(t.relfrozenxid))) < {}
-            ORDER BY
-                3, 1, 2
-        """,
-            [self.max_value, self.max_value, self.threshold],
+            TRANSACTION_ID_METRICS_QUERY,
+            [self.max_value, self.threshold],
         )
 
         if not results:
             return []
 
-        result_list = [dict(x.cells) for x in results]
-
         return [
             TransactionIdMetrics(
-                schema=row["schema"],
-                table=row["table"],
-                transactions_left=row["transactions_left"],
-                is_healthy=row["transactions_left"] >= self.threshold,
+                schema=row.cells["schema"],
+                table=row.cells["table"],
+                transactions_left=row.cells["transactions_left"],
+                is_healthy=row.cells["transactions_left"] >= self.threshold,
             )
-            for row in result_list
+            for row in results
         ]
 
     async def _get_vacuum_stats(self) -> dict[str, dict[str, str | None]]:
@@ -92,11 +92,10 @@ class VacuumHealthCalc:
         """)
         if not result:
             return {}
-        result_list = [dict(x.cells) for x in result]
         return {
-            row["relname"]: {
-                "last_vacuum": row["last_vacuum"],
-                "last_autovacuum": row["last_autovacuum"],
+            row.cells["relname"]: {
+                "last_vacuum": row.cells["last_vacuum"],
+                "last_autovacuum": row.cells["last_autovacuum"],
             }
-            for row in result_list
+            for row in result
         }
@@ -1,5 +1,7 @@
+import asyncio
 import logging
 import time
+from collections import defaultdict
 from itertools import combinations
 from typing import Any
 from typing import override
@@ -10,7 +12,9 @@ from pglast.ast import JoinExpr
 from pglast.ast import Node
 from pglast.ast import SelectStmt
 
+from ..sql import AliasInfo
 from ..sql import ColumnCollector
+from ..sql import IndexDefinition
 from ..sql import SafeSqlDriver
 from ..sql import SqlDriver
 from ..sql import TableAliasVisitor
@@ -21,11 +25,25 @@ from .index_opt_base import pp_list
 
 logger = logging.getLogger(__name__)
 
+# Identity of an index for duplicate checks: table, access method and columns (unordered for hash indexes)
+IndexKey = tuple[str, str, tuple[str, ...] | frozenset[str]]
+
 # --- Data Classes ---
 
 logger = logging.getLogger(__name__)
 
 
+def _column_ref_fields(node: ColumnRef) -> list[str]:
+    """Get the name parts of a column reference, skipping parts without a name such as `*`."""
+    fields = node.fields
+    if not fields:
+        return []
+    try:
+        return [f.sval for f in fields]
+    except AttributeError:
+        return [f.sval for f in fields if hasattr(f, "sval")]
+
+
 class DatabaseTuningAdvisor(IndexTuningBase):
     def __init__(
         self,
@@ -37,6 +55,7 @@ class DatabaseTuningAdvisor(IndexTuningBase):
         seed_columns_count: int = 3,  # how many single-col seeds to pick
         pareto_alpha: float = 2.0,
         min_time_improvement: float = 0.1,
+        collect_traces: bool = True,
     ):
         """
         :param sql_driver: Database access
@@ -47,8 +66,9 @@ class DatabaseTuningAdvisor(IndexTuningBase):
         :param seed_columns_count: how many top single-column indexes to pick as seeds
         :param pareto_alpha: stop when relative improvement falls below this threshold
         :param min_time_improvement: stop when relative improvement falls below this threshold
+        :param collect_traces: keep DTA trace messages for the session result, not just the debug log
         """
-        super().__init__(sql_driver)
+        super().__init__(sql_driver, collect_traces)
         self.budget_mb = budget_mb
         self.max_runtime_seconds = max_runtime_seconds
         self.max_index_width = max_index_width
@@ -57,6 +77,8 @@ class DatabaseTuningAdvisor(IndexTuningBase):
         self._analysis_start_time = 0.0
         self.pareto_alpha = pareto_alpha
         self.min_time_improvement = min_time_improvement
+        # Parsed existing index definitions, so each one is parsed once rather than once per candidate
+        self._existing_index_info_cache: dict[str, dict[str, Any] | None] = {}
 
     def _check_time(self) -> bool:
         """Return True if we have exceeded max_runtime_seconds."""
@@ -70,7 +92,7 @@ class DatabaseTuningAdvisor(IndexTuningBase):
         """Generate index recommendations using a hybrid 'seed + greedy' approach with a time cutoff."""
 
         # Get existing indexes
-        existing_index_defs: set[str] = {idx["definition"] for idx in await self._get_existing_indexes()}
+        existing_index_defs = await self._get_existing_indexes()
 
         logger.debug(f"Existing indexes ({len(existing_index_defs)}): {pp_list(list(existing_index_defs))}")
 
@@ -142,26 +164,26 @@ class DatabaseTuningAdvisor(IndexTuningBase):
             if kept_cols:
                 table_columns[tbl] = kept_cols
 
+        # Only combine columns used in query conditions, so candidates with unused columns are never built
+        condition_columns = self._get_condition_columns(workload)
+
         candidates = []
         for table, cols in table_columns.items():
-            # TODO: Optimize by prioritizing columns from filters/joins; current approach generates all combinations
-            col_list = list(cols)
-            for width in range(1, min(self.max_index_width, len(cols)) + 1):
-                for combo in combinations(col_list, width):
-                    candidates.append(IndexRecommendation(table=table, columns=tuple(combo)))
+            col_list = [c for c in cols if c in condition_columns.get(table, ())]
+            max_width = min(self.max_index_width, len(col_list))
+            candidates.extend(
+                IndexRecommendation(table=table, columns=combo) for width in range(1, max_width + 1) for combo in combinations(col_list, width)
+            )
 
         # filter out duplicates with existing indexes
-        filtered_candidates = [c for c in candidates if not self._index_exists(c, existing_defs)]
-
-        # filter out candidates with columns not used in query conditions
-        condition_filtered1 = self._filter_candidates_by_query_conditions(workload, filtered_candidates)
+        existing_keys = self._get_existing_index_keys(existing_defs)
+        filtered_candidates = [c for c in candidates if not self._index_exists(c, existing_defs, existing_keys)]
 
         # filter out long text columns
-        condition_filtered = await self._filter_long_text_columns(condition_filtered1)
+        condition_filtered = await self._filter_long_text_columns(filtered_candidates)
 
-        self.dta_trace(f"Generated {len(candidates)} total candidates")
+        self.dta_trace(f"Generated {len(candidates)} candidates from columns used in query conditions")
         self.dta_trace(f"Filtered to {len(filtered_candidates)} after removing existing indexes.")
-        self.dta_trace(f"Filtered to {len(condition_filtered1)} after removing unused columns.")
         self.dta_trace(f"Filtered to {len(condition_filtered)} after removing long text columns.")
         # Batch create all hypothetical indexes and store their size estimates
         if len(condition_filtered) > 0:
@@ -220,6 +242,9 @@ class DatabaseTuningAdvisor(IndexTuningBase):
 
         self.dta_trace(f"  - Base relation size: {humanize.naturalsize(base_relation_size)}")
 
+        # Fetch column statistics for every index size estimate up front
+        await self._prefetch_index_sizes(current_indexes | candidate_indexes)
+
         # Calculate current indexes size
         indexes_size = sum([await self._estimate_index_size(idx.table, list(idx.columns)) for idx in current_indexes])
 
@@ -246,26 +271,38 @@ class DatabaseTuningAdvisor(IndexTuningBase):
             best_objective = current_objective
             best_time_improvement = 0
 
-            for candidate in candidate_indexes:
+            # Build the current configuration once; each candidate only adds its own definition
+            current_definitions = frozenset(idx.index_definition for idx in current_indexes)
+
+            candidate_list = list(candidate_indexes)
+
+            # Evaluate all candidates concurrently, then select the best one in order
+            scores = await asyncio.gather(
+                *(self._score_candidate(queries, candidate, current_definitions, current_space - base_relation_size) for candidate in candidate_list)
+            )
+
+            # Candidates over the budget, which can never be selected in a later iteration
+            dead_candidates = []
+
+            for candidate, (index_size, test_time, evaluation_traces) in zip(candidate_list, scores, strict=True):
                 self.dta_trace(f"Evaluating candidate: {candidate_str([candidate])}")
-                # Calculate additional size from this index
-                index_size = await self._estimate_index_size(candidate.table, list(candidate.columns))
                 self.dta_trace(f"    + Index size: {humanize.naturalsize(index_size)}")
                 # Total space with this index = current space + new index size
                 test_space = current_space + index_size
                 self.dta_trace(f"    + Total space: {humanize.naturalsize(test_space)}")
 
                 # Check budget constraint
-                if self.budget_mb > 0 and (test_space - base_relation_size) > self.budget_mb * 1024 * 1024:
+                if test_time is None:
                     self.dta_trace(
                         f"  - Skipping candidate: {candidate_str([candidate])} because total "
                         f"index size ({humanize.naturalsize(test_space - base_relation_size)}) exceeds "
                         f"budget ({humanize.naturalsize(self.budget_mb * 1024 * 1024)})"
                     )
+                    # Space only grows as indexes are added, so it stays over budget
+                    dead_candidates.append(candidate)
                     continue
 
-                # Calculate new time (cost) with this index
-                test_time = await self._evaluate_configuration_cost(queries, frozenset(idx.index_definition for idx in current_indexes | {candidate}))
+                self._dta_traces.extend(evaluation_traces)
                 self.dta_trace(f"    + Eval cost (time): {test_time}")
 
                 # Calculate relative time improvement
@@ -290,6 +327,9 @@ class DatabaseTuningAdvisor(IndexTuningBase):
                 else:
                     self.dta_trace(f"  - Skipping candidate: {candidate_str([candidate])} because it doesn't have the best objective improvement")
 
+            # Drop over-budget candidates so later iterations don't re-evaluate them
+            candidate_indexes.difference_update(dead_candidates)
+
             # If no improvement or no valid candidates, stop
             if best_index is None:
                 self.dta_trace(f"STOPPED SEARCH: No indexes found with time improvement >= {min_time_improvement:.2%}")
@@ -341,45 +381,47 @@ class DatabaseTuningAdvisor(IndexTuningBase):
 
         return current_indexes, current_time
 
-    def _filter_candidates_by_query_conditions(
-        self, workload: list[tuple[str, SelectStmt, float]], candidates: list[IndexRecommendation]
-    ) -> list[IndexRecommendation]:
-        """Filter out index candidates that contain columns not used in query conditions."""
-        if not workload or not candidates:
-            return candidates
+    async def _score_candidate(
+        self,
+        queries: list[tuple[str, SelectStmt, float]],
+        candidate: IndexRecommendation,
+        current_definitions: frozenset[IndexDefinition],
+        current_indexes_size: int,
+    ) -> tuple[int, float | None, list[Any]]:
+        """Return a candidate's index size, its workload cost (None if it exceeds the budget) and the traces of its evaluation.
+
+        Candidates are scored concurrently, so traces are buffered and replayed in candidate order.
+        """
+        with self._buffered_traces() as traces:
+            # Calculate additional size from this index
+            index_size = await self._estimate_index_size(candidate.table, list(candidate.columns))
+
+            # Don't spend EXPLAINs on candidates that exceed the budget
+            if self.budget_mb > 0 and current_indexes_size + index_size > self.budget_mb * 1024 * 1024:
+                return index_size, None, traces
 
-        # Extract all columns used in conditions across all queries
-        condition_columns = {}  # Dictionary of table -> set of columns
+            # Calculate new time (cost) with this index
+            test_time = await self._evaluate_configuration_cost(queries, current_definitions | {candidate.index_definition})
+            return index_size, test_time, traces
+
+    def _get_condition_columns(self, workload: list[tuple[str, SelectStmt, float]]) -> dict[str, set[str]]:
+        """Extract all columns used in conditions across all queries, as table -> set of columns."""
+        condition_columns: defaultdict[str, set[str]] = defaultdict(set)
 
         for _, stmt, _ in workload:
             try:
                 # Use our enhanced collector to extract condition columns
                 collector = ConditionColumnCollector()
                 collector(stmt)
-                query_condition_columns = collector.condition_columns
 
                 # Merge with overall condition columns
-                for table, cols in query_condition_columns.items():
-                    if table not in condition_columns:
-                        condition_columns[table] = set()
+                for table, cols in collector.condition_columns.items():
                     condition_columns[table].update(cols)
 
             except Exception as e:
                 raise ValueError("Error extracting condition columns from query") from e
 
-        # Filter candidates - keep only those where all columns are in condition_columns
-        filtered_candidates = []
-        for candidate in candidates:
-            table = candidate.table
-            if table not in condition_columns:
-                continue
-
-            # Check if all columns in the index are used in conditions
-            all_columns_used = all(col in condition_columns[table] for col in candidate.columns)
-            if all_columns_used:
-                filtered_candidates.append(candidate)
-
-        return filtered_candidates
+        return dict(condition_columns)
 
     async def _filter_long_text_columns(self, candidates: list[IndexRecommendation], max_text_length: int = 100) -> list[IndexRecommendation]:
         """Filter out indexes that contain long text columns based on catalog information.
@@ -400,12 +442,8 @@ class DatabaseTuningAdvisor(IndexTuningBase):
             for column in candidate.columns:
                 table_columns.add((candidate.table, column))
 
-        # Create a list of table names for the query
-        tables_array = ",".join(f"'{table}'" for table, _ in table_columns)
-        columns_array = ",".join(f"'{col}'" for _, col in table_columns)
-
         # Query to get column types and their length limits from catalog
-        type_query = f"""
+        type_query = """
             SELECT
                 c.table_name,
                 c.column_name,
@@ -416,7 +454,7 @@ class DatabaseTuningAdvisor(IndexTuningBase):
                     WHEN c.data_type = 'text' THEN true
                     WHEN (c.data_type = 'character varying' OR c.data_type = 'varchar' OR
                          c.data_type = 'character' OR c.data_type = 'char') AND
-                         (c.character_maximum_length IS NULL OR c.character_maximum_length > {max_text_length})
+                         (c.character_maximum_length IS NULL OR c.character_maximum_length > {})
                     THEN true
                     ELSE false
                 END as potential_long_text
@@ -424,11 +462,19 @@ class DatabaseTuningAdvisor(IndexTuningBase):
             LEFT JOIN pg_stats ON
                 pg_stats.tablename = c.table_name AND
                 pg_stats.attname = c.column_name
-            WHERE c.table_name IN ({tables_array})
-            AND c.column_name IN ({columns_array})
+            WHERE c.table_name = ANY({})
+            AND c.column_name = ANY({})
         """
 
-        result = await self.sql_driver.execute_query(type_query)  # type: ignore
+        result = await SafeSqlDriver.execute_param_query(
+            self.sql_driver,
+            type_query,
+            [
+                max_text_length,
+                sorted({table for table, _ in table_columns}),
+                sorted({column for _, column in table_columns}),
+            ],
+        )
 
         logger.debug(f"Column types and length limits: {result}")
 
@@ -453,45 +499,47 @@ class DatabaseTuningAdvisor(IndexTuningBase):
             elif potential_long:
                 potential_problematic_columns.add((table, column))
 
+        # Most workloads have no long text columns at all
+        if not problematic_columns and not potential_problematic_columns:
+            return candidates
+
         # Filter candidates based on column information
         filtered_candidates = []
         for candidate in candidates:
-            valid = True
-            for column in candidate.columns:
-                if (candidate.table, column) in problematic_columns:
-                    valid = False
-                    logger.debug(f"Skipping index candidate with long text column: {candidate.table}.{column}")
-                    break
-                elif (candidate.table, column) in potential_problematic_columns:
-                    candidate.potential_problematic_reason = "long_text_column"
-
-            if valid:
-                filtered_candidates.append(candidate)
+            candidate_columns = {(candidate.table, column) for column in candidate.columns}
+            if not candidate_columns.isdisjoint(problematic_columns):
+                logger.debug(f"Skipping index candidate with long text column: {candidate_str([candidate])}")
+                continue
+            if not candidate_columns.isdisjoint(potential_problematic_columns):
+                candidate.potential_problematic_reason = "long_text_column"
+            filtered_candidates.append(candidate)
 
         return filtered_candidates
 
-    async def _get_existing_indexes(self) -> list[dict[str, Any]]:
-        """Get all existing indexes"""
+    async def _get_existing_indexes(self) -> set[str]:
+        """Get the definitions of all existing indexes"""
         # TODO: we should get the indexes that are relevant to the query
         query = """
-        SELECT schemaname as schema,
-               tablename as table,
-               indexname as name,
-               indexdef as definition
+        SELECT indexdef as definition
         FROM pg_indexes
         WHERE schemaname NOT IN ('pg_catalog', 'information_schema')
-        ORDER BY schemaname, tablename, indexname
         """
         result = await self.sql_driver.execute_query(query)
         if result is not None:
-            return [dict(row.cells) for row in result]
-        return []
+            return {row.cells["definition"] for row in result}
+        return set()
 
-    def _index_exists(self, index: IndexRecommendation, existing_defs: set[str]) -> bool:
+    def _index_exists(
+        self,
+        index: IndexRecommendation,
+        existing_defs: set[str],
+        existing_keys: tuple[set[IndexKey], set[IndexKey]] | None = None,
+    ) -> bool:
         """Check if an index with the same table, columns, and type already exists in the database.
 
         Uses pglast to parse index definitions and compare their structure rather than
-        doing simple string matching.
+        doing simple string matching. Pass `existing_keys` from `_get_existing_index_keys`
+        when checking many candidates against the same definitions.
         """
         from pglast import parser
 
@@ -507,29 +555,47 @@ class DatabaseTuningAdvisor(IndexTuningBase):
             if not candidate_info:
                 return index.definition in existing_defs
 
-            # Check each existing index
-            for existing_def in existing_defs:
-                try:
-                    # Skip if it's obviously not an index
-                    if not ("CREATE INDEX" in existing_def.upper() or "CREATE UNIQUE INDEX" in existing_def.upper()):
-                        continue
+            if existing_keys is None:
+                existing_keys = self._get_existing_index_keys(existing_defs)
+            all_keys, unique_keys = existing_keys
 
-                    # Parse the existing index
-                    existing_stmt = parser.parse_sql(existing_def)[0]
-                    existing_node = existing_stmt.stmt
+            # A unique candidate is only covered by an existing unique index
+            return self._index_key(candidate_info) in (unique_keys if candidate_info["unique"] else all_keys)
+        except Exception as e:
+            raise ValueError("Error in robust index comparison") from e
 
-                    # Extract key information
-                    existing_info = self._extract_index_info(existing_node)
+    def _get_existing_index_keys(self, existing_defs: set[str]) -> tuple[set[IndexKey], set[IndexKey]]:
+        """Build lookup keys for all existing indexes and for the unique ones among them."""
+        all_keys: set[IndexKey] = set()
+        unique_keys: set[IndexKey] = set()
+        for existing_def in existing_defs:
+            existing_info = self._get_existing_index_info(existing_def)
+            if existing_info:
+                key = self._index_key(existing_info)
+                all_keys.add(key)
+                if existing_info["unique"]:
+                    unique_keys.add(key)
+        return all_keys, unique_keys
+
+    def _get_existing_index_info(self, existing_def: str) -> dict[str, Any] | None:
+        """Get the key information of an existing index definition, parsing it only on first use."""
+        if existing_def in self._existing_index_info_cache:
+            return self._existing_index_info_cache[existing_def]
 
-                    # Compare the key components
-                    if existing_info and self._is_same_index(candidate_info, existing_info):
-                        return True
-                except Exception as e:
-                    raise ValueError("Error parsing existing index") from e
+        from pglast import parser
 
-            return False
+        existing_info = None
+        try:
+            # Skip if it's obviously not an index
+            if "CREATE INDEX" in existing_def.upper() or "CREATE UNIQUE INDEX" in existing_def.upper():
+                # Parse the existing index and extract key information
+                existing_stmt = parser.parse_sql(existing_def)[0]
+                existing_info = self._extract_index_info(existing_stmt.stmt)
         except Exception as e:
-            raise ValueError("Error in robust index comparison") from e
+            raise ValueError("Error parsing existing index") from e
+
+        self._existing_index_info_cache[existing_def] = existing_info
+        return existing_info
 
     def _extract_index_info(self, node) -> dict[str, Any] | None:
         """Extract key information from a parsed index node."""
@@ -624,33 +690,11 @@ class DatabaseTuningAdvisor(IndexTuningBase):
         except Exception as e:
             raise ValueError("Error converting expression to string") from e
 
-    def _is_same_index(self, index1: dict[str, Any], index2: dict[str, Any]) -> bool:
-        """Check if two indexes are functionally equivalent."""
-        if not index1 or not index2:
-            return False
-
-        # Same table?
-        if index1["table"] != index2["table"]:
-            return False
-
-        # Same index type?
-        if index1["type"] != index2["type"]:
-            return False
-
-        # Same columns (order matters for most index types)?
-        if index1["columns"] != index2["columns"]:
-            # For hash indexes, order doesn't matter
-            if index1["type"] == "hash" and set(index1["columns"]) == set(index2["columns"]):
-                return True
-            return False
-
-        # If one is unique and the other is not, they're different
-        # Except when a primary key (which is unique) exists and we're considering a non-unique index on same column
-        if index1["unique"] and not index2["unique"]:
-            return False
-
-        # Same core definition
-        return True
+    def _index_key(self, index_info: dict[str, Any]) -> IndexKey:
+        """Build a key under which functionally equivalent indexes compare equal."""
+        # Column order matters for most index types, but not for hash indexes
+        columns = frozenset(index_info["columns"]) if index_info["type"] == "hash" else tuple(index_info["columns"])
+        return (index_info["table"], index_info["type"], columns)
 
 
 class ConditionColumnCollector(ColumnCollector):
@@ -661,7 +705,7 @@ class ConditionColumnCollector(ColumnCollector):
 
     def __init__(self) -> None:
         super().__init__()
-        self.condition_columns = {}  # Specifically for columns in conditions
+        self.condition_columns: defaultdict[str, set[str]] = defaultdict(set)  # Specifically for columns in conditions
         self.in_condition = False  # Flag to track if we're inside a condition
 
     def __call__(self, node):
@@ -674,34 +718,36 @@ class ConditionColumnCollector(ColumnCollector):
         while still collecting column aliases.
         """
         if isinstance(node, SelectStmt):
+            # Nothing to collect without conditions or ordering; nested queries are still visited
+            join_quals = [item.quals for item in node.fromClause or () if isinstance(item, JoinExpr) and item.quals]
+            if not (node.whereClause or node.havingClause or node.sortClause or join_quals):
+                self.inside_select = False
+                return
+
             self.inside_select = True
             self.current_query_level += 1
             query_level = self.current_query_level
 
             # Get table aliases first
             alias_visitor = TableAliasVisitor()
-            if hasattr(node, "fromClause") and node.fromClause:
+            if node.fromClause:
                 for from_item in node.fromClause:
                     alias_visitor(from_item)
-            tables = alias_visitor.tables
+            # Strip any schema qualification once per scope rather than per column reference
+            tables = {table.split(".", 1)[-1] for table in alias_visitor.tables}
             aliases = alias_visitor.aliases
 
             # Store the context for this query
             self.context_stack.append((tables, aliases))
 
             # First pass: collect column aliases from targetList
-            if hasattr(node, "targetList") and node.targetList:
+            if node.targetList:
                 self.target_list = node.targetList
                 for target_entry in self.target_list:
-                    if hasattr(target_entry, "name") and target_entry.name:
-                        # This is a column alias
-                        col_alias = target_entry.name
-                        # Store the expression node for this alias
-                        if hasattr(target_entry, "val"):
-                            self.column_aliases[col_alias] = {
-                                "node": target_entry.val,
-                                "level": query_level,
-                            }
+                    # A named target entry is a column alias; store its expression node
+                    col_alias = target_entry.name
+                    if col_alias:
+                        self.column_aliases[col_alias] = AliasInfo(node=target_entry.val, level=query_level)
 
             # Process WHERE clause
             if node.whereClause:
@@ -710,14 +756,13 @@ class ConditionColumnCollector(ColumnCollector):
                 self(node.whereClause)
                 self.in_condition = in_condition_cache
 
-            # Process JOIN conditions in fromClause
-            if node.fromClause:
-                for item in node.fromClause:
-                    if isinstance(item, JoinExpr) and item.quals:
-                        in_condition_cache = self.in_condition
-                        self.in_condition = True
-                        self(item.quals)
-                        self.in_condition = in_condition_cache
+            # Process JOIN conditions gathered from fromClause above
+            if join_quals:
+                in_condition_cache = self.in_condition
+                self.in_condition = True
+                for quals in join_quals:
+                    self(quals)
+                self.in_condition = in_condition_cache
 
             # Process HAVING clause - may reference aliases
             if node.havingClause:
@@ -727,7 +772,7 @@ class ConditionColumnCollector(ColumnCollector):
                 self.in_condition = in_condition_cache
 
             # Process ORDER BY clause - also important for indexes
-            if hasattr(node, "sortClause") and node.sortClause:
+            if node.sortClause:
                 in_condition_cache = self.in_condition
                 self.in_condition = True
                 for sort_item in node.sortClause:
@@ -758,15 +803,15 @@ class ConditionColumnCollector(ColumnCollector):
 
         # If node is a column reference, it might be an alias
         if isinstance(node, ColumnRef) and hasattr(node, "fields") and node.fields:
-            fields = [f.sval for f in node.fields if hasattr(f, "sval")] if node.fields else []
+            fields = _column_ref_fields(node)
             if len(fields) == 1:
                 col_name = fields[0]
                 # Check if this is a known alias
                 if col_name in self.column_aliases:
                     # Process the original expression instead
                     alias_info = self.column_aliases[col_name]
-                    if alias_info["level"] == self.current_query_level:
-                        self(alias_info["node"])
+                    if alias_info.level == self.current_query_level:
+                        self(alias_info.node)
                         return
 
         # For non-alias nodes, process normally
@@ -786,16 +831,27 @@ class ConditionColumnCollector(ColumnCollector):
         # Get the current query context
         tables, aliases = self.context_stack[-1]
 
+        # Fast path for the common qualified table.column form; `t.*` falls through
+        raw_fields = node.fields
+        if raw_fields and len(raw_fields) == 2:
+            try:
+                table_or_alias, column = raw_fields[0].sval, raw_fields[1].sval
+            except AttributeError:
+                pass
+            else:
+                self.condition_columns[aliases.get(table_or_alias, table_or_alias)].add(column)
+                return
+
         # Extract table and column names
-        fields = [f.sval for f in node.fields if hasattr(f, "sval")] if node.fields else []
+        fields = _column_ref_fields(node)
 
         # Check if this is a reference to a column alias
         if len(fields) == 1 and fields[0] in self.column_aliases:
             # Process the original expression node instead
             alias_info = self.column_aliases[fields[0]]
-            if alias_info["level"] == self.current_query_level:
+            if alias_info.level == self.current_query_level:
                 self.in_condition = True  # Ensure we collect from the aliased expression
-                self(alias_info["node"])
+                self(alias_info.node)
             return
 
         if len(fields) == 2:  # Table.column format
@@ -804,8 +860,6 @@ class ConditionColumnCollector(ColumnCollector):
             table = aliases.get(table_or_alias, table_or_alias)
 
             # Add to condition columns
-            if table not in self.condition_columns:
-                self.condition_columns[table] = set()
             self.condition_columns[table].add(column)
 
         elif len(fields) == 1:  # Unqualified column
@@ -814,14 +868,8 @@ class ConditionColumnCollector(ColumnCollector):
             # For unqualified columns, check all tables in context
             found_match = False
             for table in tables:
-                # Skip schema qualification if present
-                if "." in table:
-                    _, table = table.split(".", 1)
-
                 # Add column to all tables that have it
                 if self._column_exists(table, column):
-                    if table not in self.condition_columns:
-                        self.condition_columns[table] = set()
                     self.condition_columns[table].add(column)
                     found_match = True
 
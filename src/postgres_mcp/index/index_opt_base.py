@@ -1,15 +1,21 @@
+import asyncio
 import json
 import logging
 import time
 from abc import ABC
 from abc import abstractmethod
+from contextlib import contextmanager
+from contextvars import ContextVar
 from dataclasses import dataclass
 from dataclasses import field
+from itertools import accumulate
 from typing import Any
 from typing import Iterable
+from typing import Iterator
 
 from pglast import parse_sql
 from pglast.ast import SelectStmt
+from pglast.parser import split
 
 from ..artifacts import calculate_improvement_multiple
 from ..explain import ExplainPlanTool
@@ -23,6 +29,11 @@ from ..sql import check_hypopg_installation_status
 logger = logging.getLogger(__name__)
 
 MAX_NUM_INDEX_TUNING_QUERIES = 10
+# Stay below DbConnPool's max_size of 5 so other queries can still get a connection
+MAX_CONCURRENT_EXPLAINS = 4
+
+# Traces emitted by the current task while it runs concurrently with others, replayed in order later
+_trace_buffer: ContextVar[list[Any] | None] = ContextVar("_trace_buffer", default=None)
 
 
 def pp_list(lst: list[Any]) -> str:
@@ -30,7 +41,7 @@ def pp_list(lst: list[Any]) -> str:
     return ("\n  - " if len(lst) > 0 else "") + "\n  - ".join([str(item) for item in lst])
 
 
-@dataclass
+@dataclass(slots=True)
 class IndexRecommendation:
     """Represents a database index with size estimation and definition."""
 
@@ -87,7 +98,7 @@ class IndexRecommendation:
         return self._definition.__repr__() + f" (estimated_size_bytes: {self.estimated_size_bytes})"
 
 
-@dataclass
+@dataclass(slots=True)
 class IndexRecommendationAnalysis:
     """Represents a recommended index with benefit estimation."""
 
@@ -160,11 +171,14 @@ class IndexTuningBase(ABC):
     def __init__(
         self,
         sql_driver: SqlDriver,
+        collect_traces: bool = True,
     ):
         """
         :param sql_driver: Database access
+        :param collect_traces: keep DTA trace messages for the session result, not just the debug log
         """
         self.sql_driver = sql_driver
+        self.collect_traces = collect_traces
 
         # Add memoization caches
         self.cost_cache: dict[frozenset[IndexDefinition], float] = {}
@@ -172,7 +186,13 @@ class IndexTuningBase(ABC):
         self._table_size_cache = {}
         self._estimate_table_size_cache = {}
         self._explain_plans_cache = {}
+        self._query_tables_cache: dict[str, set[str]] = {}
+        self._relation_kinds_cache: dict[str, frozenset[str]] = {}
         self._sql_bind_params = SqlBindParams(self.sql_driver)
+        self._explain_plan_tool = ExplainPlanTool(self.sql_driver)
+
+        # Bound concurrent EXPLAINs so cost evaluation leaves a pooled connection free
+        self._explain_semaphore = asyncio.Semaphore(MAX_CONCURRENT_EXPLAINS)
 
         # Add trace accumulator
         self._dta_traces: list[str] = []
@@ -328,22 +348,23 @@ class IndexTuningBase(ABC):
     async def _validate_and_parse_workload(self, workload: list[dict[str, Any]]) -> list[dict[str, Any]]:
         """Validate the workload to ensure it is analyzable."""
         validated_workload = []
+        non_empty_workload = []
         for q in workload:
-            query_text = q["query"]
-            if not query_text:
+            if not q["query"]:
                 logger.debug("Skipping empty query")
                 continue
-            query_text = query_text.strip().lower()
+            non_empty_workload.append(q)
 
-            # Replace parameter placeholders with dummy values
-            query_text = await self._sql_bind_params.replace_parameters(query_text)
+        # Replace parameter placeholders with dummy values; column statistics lookups for all queries overlap
+        query_texts = await asyncio.gather(*(self._replace_parameters(q["query"].strip().lower()) for q in non_empty_workload))
 
+        for q, query_text in zip(non_empty_workload, query_texts, strict=True):
             parsed = parse_sql(query_text)
             if not parsed:
                 logger.debug(f"Skipping non-parseable query: {query_text[:50]}...")
                 continue
             stmt = parsed[0].stmt
-            if not self._is_analyzable_stmt(stmt):
+            if not self._is_analyzable_stmt(query_text, stmt):
                 logger.debug(f"Skipping non-analyzable query: {query_text[:50]}...")
                 continue
 
@@ -352,6 +373,11 @@ class IndexTuningBase(ABC):
             validated_workload.append(q)
         return validated_workload
 
+    async def _replace_parameters(self, query: str) -> str:
+        """Replace parameter placeholders in a query, bounded by the explain semaphore."""
+        async with self._explain_semaphore:
+            return await self._sql_bind_params.replace_parameters(query)
+
     def _covert_workload_to_query_weights(self, workload: list[dict[str, Any]]) -> list[tuple[str, SelectStmt, float]]:
         """Convert workload to query weights based on query frequency."""
         return [(q["query"], q["stmt"], self.convert_query_info_to_weight(q)) for q in workload]
@@ -380,9 +406,8 @@ class IndexTuningBase(ABC):
         if existing_plan:
             return existing_plan
 
-        # Generate the plan using the static method
-        explain_plan_tool = ExplainPlanTool(self.sql_driver)
-        plan = await explain_plan_tool.generate_explain_plan_with_hypothetical_indexes(query_text, indexes, False, self)
+        # Generate the plan with the hypothetical indexes
+        plan = await self._explain_plan_tool.generate_explain_plan_with_hypothetical_indexes(query_text, indexes, False, self)
 
         # Cache the result
         self._explain_plans_cache[cache_key] = plan
@@ -394,8 +419,9 @@ class IndexTuningBase(ABC):
             with open(file_path) as f:
                 content = f.read()
 
-            # Split the file content by semicolons to get individual queries
-            query_texts = [q.strip() for q in content.split(";") if q.strip()]
+            # Split the file content into individual queries with the SQL scanner, so semicolons
+            # inside string literals or dollar-quoted bodies don't break a statement apart
+            query_texts = [q.strip() for q in split(content, with_parser=False) if q.strip()]
             queries = []
 
             for i, text in enumerate(query_texts):
@@ -433,20 +459,63 @@ class IndexTuningBase(ABC):
         )
         return [dict(row.cells) for row in result] if result else []
 
-    def _is_analyzable_stmt(self, stmt: Any) -> bool:
+    def _is_analyzable_stmt(self, query_text: str, stmt: Any) -> bool:
         """Check if a statement can be analyzed for index recommendations."""
         # It should be a SelectStmt
         if not isinstance(stmt, SelectStmt):
             return False
 
-        visitor = TableAliasVisitor()
-        visitor(stmt)
+        # The memoized table walk is reused when costing this query
+        tables = self._get_query_tables(query_text, stmt)
 
         # Skip queries that only access system tables
-        if all(table.startswith("pg_") or table.startswith("aurora_") for table in visitor.tables):
+        if all(table.startswith("pg_") or table.startswith("aurora_") for table in tables):
             return False
         return True
 
+    def _get_query_tables(self, query_text: str, stmt: SelectStmt) -> set[str]:
+        """Get the tables referenced by a query, memoized by query text."""
+        tables = self._query_tables_cache.get(query_text)
+        if tables is None:
+            visitor = TableAliasVisitor()
+            visitor(stmt)
+            tables = self._query_tables_cache[query_text] = visitor.tables
+        return tables
+
+    async def _resolve_relation_kinds(self, weighted_workload: list[tuple[str, SelectStmt, float]]) -> None:
+        """Look up the pg_class kinds of the relations referenced by the workload that are not cached yet."""
+        relations = {table for query_text, stmt, _ in weighted_workload for table in self._get_query_tables(query_text, stmt)}
+        missing = sorted(relations - self._relation_kinds_cache.keys())
+        if not missing:
+            return
+
+        kinds: dict[str, set[str]] = {}
+        try:
+            result = await SafeSqlDriver.execute_param_query(
+                self.sql_driver, "SELECT relname, relkind FROM pg_class WHERE relname = ANY({})", [missing]
+            )
+            for row in result or []:
+                kinds.setdefault(row.cells["relname"], set()).add(row.cells["relkind"])
+        except Exception as e:
+            logger.warning(f"Error looking up relation kinds: {e}")
+
+        # Relations missing from the catalog (e.g. CTE names) are cached with no kinds
+        for relation in missing:
+            self._relation_kinds_cache[relation] = frozenset(kinds.get(relation, ()))
+
+    def _get_indexable_query_tables(self, query_text: str, stmt: SelectStmt) -> set[str] | None:
+        """Get the tables whose indexes can affect a query's plan, or None if they can't be resolved.
+
+        A query that reads through a view, a CTE or any relation not resolved as a table or
+        materialized view may be planned with indexes on tables it doesn't name.
+        """
+        tables = self._get_query_tables(query_text, stmt)
+        for table in tables:
+            kinds = self._relation_kinds_cache.get(table)
+            if not kinds or not kinds <= {"r", "m"}:
+                return None
+        return tables
+
     def dta_trace(self, message: Any, exc_info: bool = False):
         """Convenience function to log DTA thinking process."""
 
@@ -456,7 +525,19 @@ class IndexTuningBase(ABC):
         else:
             logger.debug(message)
 
-        self._dta_traces.append(message)
+        if self.collect_traces:
+            buffer = _trace_buffer.get()
+            (self._dta_traces if buffer is None else buffer).append(message)
+
+    @contextmanager
+    def _buffered_traces(self) -> Iterator[list[Any]]:
+        """Collect the traces of the current task in a list instead of the session traces."""
+        traces: list[Any] = []
+        token = _trace_buffer.set(traces)
+        try:
+            yield traces
+        finally:
+            _trace_buffer.reset(token)
 
     async def _evaluate_configuration_cost(
         self,
@@ -471,22 +552,20 @@ class IndexTuningBase(ABC):
 
         self.dta_trace(f"  - Evaluating cost for configuration: {candidate_str(indexes)}")
 
-        total_cost = 0.0
-        valid_queries = 0
-
         try:
-            # Calculate cost for all queries with this configuration
-            for query_text, _stmt, weight in weighted_workload:
-                try:
-                    # Get the explain plan using our memoized helper
-                    plan_data = await self.get_explain_plan_with_indexes(query_text, indexes)
-
-                    # Extract cost from the plan data
-                    cost = self.extract_cost_from_json_plan(plan_data)
-                    total_cost += cost * weight
-                    valid_queries += 1
-                except Exception as e:
-                    raise ValueError(f"Error executing explain for query: {query_text}") from e
+            await self._resolve_relation_kinds(weighted_workload)
+
+            # Calculate cost for all queries with this configuration concurrently
+            weighted_costs = await asyncio.gather(
+                *(self._evaluate_query_cost(query_text, stmt, indexes, weight) for query_text, stmt, weight in weighted_workload),
+                return_exceptions=True,
+            )
+            for weighted_cost in weighted_costs:
+                if isinstance(weighted_cost, BaseException):
+                    raise weighted_cost
+
+            total_cost = sum(weighted_costs)  # type: ignore
+            valid_queries = len(weighted_costs)
 
             if valid_queries == 0:
                 self.dta_trace("    + no valid queries found for cost evaluation")
@@ -501,6 +580,24 @@ class IndexTuningBase(ABC):
             self.dta_trace(f"    + error evaluating configuration: {e}")
             raise ValueError("Error evaluating configuration") from e
 
+    async def _evaluate_query_cost(self, query_text: str, stmt: SelectStmt, indexes: frozenset[IndexDefinition], weight: float) -> float:
+        """Get the weighted cost of a single query, bounded by the explain semaphore."""
+        # Indexes on tables the query doesn't reference can't change its plan, so leave them out
+        # of the explain plan cache key to reuse plans across configurations
+        query_tables = self._get_indexable_query_tables(query_text, stmt)
+        if query_tables is not None:
+            indexes = frozenset(idx for idx in indexes if idx.table.rsplit(".", 1)[-1] in query_tables)
+
+        async with self._explain_semaphore:
+            try:
+                # Get the explain plan using our memoized helper
+                plan_data = await self.get_explain_plan_with_indexes(query_text, indexes)
+
+                # Extract cost from the plan data
+                return self.extract_cost_from_json_plan(plan_data) * weight
+            except Exception as e:
+                raise ValueError(f"Error executing explain for query: {query_text}") from e
+
     async def _estimate_index_size(self, table: str, columns: list[str]) -> int:
         # Create a hashable key for the cache
         cache_key = (table, frozenset(columns))
@@ -523,7 +620,7 @@ class IndexTuningBase(ABC):
                 [table, columns],
             )
             if result and result[0].cells:
-                size_estimate = self._estimate_index_size_internal(dict(result[0].cells))
+                size_estimate = self._estimate_index_size_internal(result[0].cells)
 
                 # Cache the result
                 self._size_estimate_cache[cache_key] = size_estimate
@@ -532,6 +629,42 @@ class IndexTuningBase(ABC):
         except Exception as e:
             raise ValueError("Error estimating index size") from e
 
+    async def _prefetch_index_sizes(self, indexes: Iterable[IndexRecommendation]) -> None:
+        """Populate the size estimate cache for many indexes with a single pg_stats query."""
+        pending = [idx for idx in indexes if (idx.table, frozenset(idx.columns)) not in self._size_estimate_cache]
+        if not pending:
+            return
+
+        try:
+            stats_query = """
+            SELECT tablename, attname,
+                   COALESCE(SUM(avg_width), 0) AS total_width,
+                   COALESCE(SUM(n_distinct), 0) AS total_distinct
+            FROM pg_stats
+            WHERE tablename = ANY({}) AND attname = ANY({})
+            GROUP BY tablename, attname
+            """
+            result = await SafeSqlDriver.execute_param_query(
+                self.sql_driver,
+                stats_query,
+                [
+                    sorted({idx.table for idx in pending}),
+                    sorted({column for idx in pending for column in idx.columns}),
+                ],
+            )
+        except Exception as e:
+            raise ValueError("Error estimating index size") from e
+
+        column_stats = {(row.cells["tablename"], row.cells["attname"]): row.cells for row in result or []}
+        for idx in pending:
+            stats = [column_stats[(idx.table, column)] for column in idx.columns if (idx.table, column) in column_stats]
+            self._size_estimate_cache[(idx.table, frozenset(idx.columns))] = self._estimate_index_size_internal(
+                {
+                    "total_width": sum(s["total_width"] or 0 for s in stats),
+                    "total_distinct": sum(s["total_distinct"] or 0 for s in stats),
+                }
+            )
+
     def _estimate_index_size_internal(self, stats: dict[str, Any]) -> int:
         width = (stats["total_width"] or 0) + 8  # 8 bytes for the heap TID
         ndistinct = stats["total_distinct"] or 1.0
@@ -550,20 +683,25 @@ class IndexTuningBase(ABC):
         budget_bytes = self.budget_mb * 1024 * 1024
         individual_base_cost = await self._evaluate_configuration_cost(query_weights, frozenset()) or 1.0
         progressive_base_cost = individual_base_cost
-        indexes_so_far: list[IndexRecommendation] = []
-        for index_config in best_config[0]:
-            indexes_so_far.append(index_config)
-            # Calculate the cost with only this index
-            progressive_cost = await self._evaluate_configuration_cost(
-                query_weights,
-                frozenset(idx.index_definition for idx in indexes_so_far),  # Indexes so far
-            )
-            individual_cost = await self._evaluate_configuration_cost(
-                query_weights,
-                frozenset([index_config.index_definition]),  # Only this index
-            )
 
-            size = await self._estimate_index_size(index_config.table, list(index_config.columns))
+        # Progressive (indexes so far) and individual (only this index) configurations don't depend
+        # on the budget, so evaluate every distinct one concurrently up front
+        index_configs = list(best_config[0])
+        individual_configs = [frozenset([idx.index_definition]) for idx in index_configs]
+        progressive_configs = list(accumulate(individual_configs, frozenset.union))
+        distinct_configs = list(dict.fromkeys(progressive_configs + individual_configs))
+        # A no-op when the search already fetched these sizes; otherwise one pg_stats round-trip for all of them
+        await self._prefetch_index_sizes(index_configs)
+        config_costs, sizes = await asyncio.gather(
+            asyncio.gather(*(self._evaluate_configuration_cost(query_weights, config) for config in distinct_configs)),
+            asyncio.gather(*(self._estimate_index_size(idx.table, list(idx.columns)) for idx in index_configs)),
+        )
+        cost_by_config = dict(zip(distinct_configs, config_costs, strict=True))
+
+        for i, index_config in enumerate(index_configs):
+            progressive_cost = cost_by_config[progressive_configs[i]]
+            individual_cost = cost_by_config[individual_configs[i]]
+            size = sizes[i]
             if budget_bytes < 0 or total_size + size <= budget_bytes:
                 self.dta_trace(f"Adding index: {candidate_str([index_config])}")
                 rec = IndexRecommendationAnalysis(
@@ -1,3 +1,4 @@
+import asyncio
 import logging
 import math
 from dataclasses import dataclass
@@ -60,11 +61,14 @@ class LLMOptimizerTool(IndexTuningBase):
         sql_driver: SqlDriver,
         max_no_progress_attempts: int = 5,
         pareto_alpha: float = 2.0,
+        collect_traces: bool = True,
     ):
-        super().__init__(sql_driver)
+        super().__init__(sql_driver, collect_traces)
         self.sql_driver = sql_driver
         self.max_no_progress_attempts = max_no_progress_attempts
         self.pareto_alpha = pareto_alpha
+        # hypopg sizes by index; the same index often recurs across LLM alternatives and iterations
+        self._hypopg_size_cache: dict[IndexDefinition, float] = {}
         logger.info("Initialized LLMOptimizerTool with max_no_progress_attempts=%d", max_no_progress_attempts)
 
     def score(self, execution_cost: float, index_size: float) -> float:
@@ -182,24 +186,25 @@ class LLMOptimizerTool(IndexTuningBase):
                 logger.warning("No index alternatives were generated by the LLM")
                 break
 
+            # Evaluate all alternatives concurrently, then score them in order
+            evaluations = await asyncio.gather(
+                *(self._evaluate_alternative(query_weights, index_set) for index_set in index_alternatives), return_exceptions=True
+            )
+
             # Try each alternative
             found_improvement = False
-            for i, index_set in enumerate(index_alternatives):
+            for i, (index_set, evaluation) in enumerate(zip(index_alternatives, evaluations, strict=True)):
                 try:
-                    logger.info("Evaluating alternative %d/%d with %d indexes", i + 1, len(index_alternatives), len(index_set))
-                    # Evaluate this index configuration
-                    execution_cost_estimate = await self._evaluate_configuration_cost(
-                        query_weights, frozenset({index.to_index_definition() for index in index_set})
-                    )
+                    logger.info("Evaluated alternative %d/%d with %d indexes", i + 1, len(index_alternatives), len(index_set))
+                    if isinstance(evaluation, BaseException):
+                        raise evaluation
+                    execution_cost_estimate, index_size_estimate = evaluation
                     logger.info(
                         "Alternative %d cost: %f (reduction: %.2f%%)",
                         i + 1,
                         execution_cost_estimate,
                         ((best_config.execution_cost - execution_cost_estimate) / best_config.execution_cost) * 100,
                     )
-
-                    # Estimate the size of the indexes
-                    index_size_estimate = await self._estimate_index_size_2({index.to_index_definition() for index in index_set}, 1024 * 1024)
                     logger.info("Estimated index size: %f", index_size_estimate)
 
                     # Score based on a balance of size and performance
@@ -250,6 +255,15 @@ class LLMOptimizerTool(IndexTuningBase):
         best_index_config_set = {index.to_index_recommendation() for index in best_config.indexes}
         return (best_index_config_set, best_config.execution_cost)
 
+    async def _evaluate_alternative(self, query_weights: list[tuple[str, SelectStmt, float]], index_set: set[Index]) -> tuple[float, float]:
+        """Estimate the execution cost and total index size of one index configuration suggested by the LLM."""
+        index_definitions = {index.to_index_definition() for index in index_set}
+        execution_cost_estimate, index_size_estimate = await asyncio.gather(
+            self._evaluate_configuration_cost(query_weights, frozenset(index_definitions)),
+            self._estimate_index_size_2(index_definitions, 1024 * 1024),
+        )
+        return execution_cost_estimate, index_size_estimate
+
     async def _estimate_index_size_2(self, index_set: set[IndexDefinition], min_size_penalty: float = 1024 * 1024) -> float:
         """
         Estimate the size of a set of indexes using hypopg.
@@ -266,6 +280,11 @@ class LLMOptimizerTool(IndexTuningBase):
         total_size = 0.0
 
         for index_config in index_set:
+            cached_size = self._hypopg_size_cache.get(index_config)
+            if cached_size is not None:
+                total_size += max(cached_size, min_size_penalty)
+                continue
+
             try:
                 # Create a hypothetical index using hypopg
                 # Using a tuple to avoid LiteralString type error
@@ -280,6 +299,7 @@ class LLMOptimizerTool(IndexTuningBase):
                 if result and len(result) > 0:
                     # Extract the size from the result
                     size = result[0].cells.get("size", 0)
+                    self._hypopg_size_cache[index_config] = float(size)
                     total_size += max(float(size), min_size_penalty)
                     logger.debug(f"Estimated size for index {index_config.name}: {size} bytes")
                 else:
@@ -304,21 +324,19 @@ class LLMOptimizerTool(IndexTuningBase):
         if isinstance(explain_plan_json, dict):
             plan_data = explain_plan_json.get("Plan")
             if plan_data is not None:
-
-                def extract_indexes_from_node(node):
+                # Walk the plan tree with an explicit stack, starting from the root plan
+                stack = [plan_data]
+                while stack:
+                    node = stack.pop()
                     # Check if this is an index scan node
-                    if node.get("Node Type") in ["Index Scan", "Index Only Scan", "Bitmap Index Scan"]:
+                    if node.get("Node Type") in ("Index Scan", "Index Only Scan", "Bitmap Index Scan"):
                         if "Index Name" in node and "Relation Name" in node:
                             # Add the table name and index name
                             indexes_used.add((node["Relation Name"], node["Index Name"]))
 
-                    # Recursively process child plans
-                    if "Plans" in node:
-                        for child in node["Plans"]:
-                            extract_indexes_from_node(child)
+                    # Process child plans
+                    stack.extend(node.get("Plans", ()))
 
-                # Start extraction from the root plan
-                extract_indexes_from_node(plan_data)
                 logger.info("Extracted %d indexes from explain plan", len(indexes_used))
 
         return indexes_used
@@ -1,7 +1,6 @@
 """Database Tuning Advisor (DTA) tool for Postgres MCP."""
 
 import logging
-import os
 from typing import Any
 from typing import Dict
 from typing import List
@@ -123,8 +122,7 @@ class TextPresentation:
             )
 
             # Prepare the response to send back to the caller
-            include_langfuse_trace = os.environ.get("POSTGRES_MCP_INCLUDE_LANGFUSE_TRACE", "true").lower() == "true"
-            langfuse_trace = {"_langfuse_trace": session.dta_traces} if include_langfuse_trace else {}
+            langfuse_trace = {"_langfuse_trace": session.dta_traces} if self.index_tuning.collect_traces else {}
 
             if session.error:
                 return {
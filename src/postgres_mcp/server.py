@@ -71,6 +71,11 @@ async def get_sql_driver() -> Union[SqlDriver, SafeSqlDriver]:
         return base_driver
 
 
+def include_langfuse_trace() -> bool:
+    """Whether index tuning collects DTA traces and returns them with its results."""
+    return os.environ.get("POSTGRES_MCP_INCLUDE_LANGFUSE_TRACE", "true").lower() == "true"
+
+
 def format_text_response(text: Any) -> ResponseType:
     """Format a text response."""
     return [types.TextContent(type="text", text=str(text))]
@@ -443,9 +448,9 @@ async def analyze_workload_indexes(
     try:
         sql_driver = await get_sql_driver()
         if method == "dta":
-            index_tuning = DatabaseTuningAdvisor(sql_driver)
+            index_tuning = DatabaseTuningAdvisor(sql_driver, collect_traces=include_langfuse_trace())
         else:
-            index_tuning = LLMOptimizerTool(sql_driver)
+            index_tuning = LLMOptimizerTool(sql_driver, collect_traces=include_langfuse_trace())
         dta_tool = TextPresentation(sql_driver, index_tuning)
         result = await dta_tool.analyze_workload(max_index_size_mb=max_index_size_mb)
         return format_text_response(result)
@@ -476,9 +481,9 @@ async def analyze_query_indexes(
     try:
         sql_driver = await get_sql_driver()
         if method == "dta":
-            index_tuning = DatabaseTuningAdvisor(sql_driver)
+            index_tuning = DatabaseTuningAdvisor(sql_driver, collect_traces=include_langfuse_trace())
         else:
-            index_tuning = LLMOptimizerTool(sql_driver)
+            index_tuning = LLMOptimizerTool(sql_driver, collect_traces=include_langfuse_trace())
         dta_tool = TextPresentation(sql_driver, index_tuning)
         result = await dta_tool.analyze_queries(queries=queries, max_index_size_mb=max_index_size_mb)
         return format_text_response(result)
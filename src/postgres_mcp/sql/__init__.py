@@ -1,5 +1,6 @@
 """SQL utilities."""
 
+from .bind_params import AliasInfo
 from .bind_params import ColumnCollector
 from .bind_params import SqlBindParams
 from .bind_params import TableAliasVisitor
@@ -15,6 +16,7 @@ from .sql_driver import SqlDriver
 from .sql_driver import obfuscate_password
 
 __all__ = [
+    "AliasInfo",
     "ColumnCollector",
     "DbConnPool",
     "IndexDefinition",
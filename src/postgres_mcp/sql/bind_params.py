@@ -3,6 +3,7 @@
 import logging
 import re
 from typing import Any
+from typing import NamedTuple
 
 from pglast import parse_sql
 from pglast.ast import A_Expr
@@ -24,6 +25,13 @@ logger = logging.getLogger(__name__)
 # --- Visitor Classes ---
 
 
+class AliasInfo(NamedTuple):
+    """The expression behind a column alias and the query level that defines it."""
+
+    node: Any
+    level: int
+
+
 class TableAliasVisitor(Visitor):
     """Extracts table aliases and names from the SQL AST."""
 
@@ -65,7 +73,7 @@ class ColumnCollector(Visitor):
         self.columns = {}  # Collected columns, keyed by table
         self.target_list = None
         self.inside_select = False
-        self.column_aliases = {}  # Track column aliases and their definitions
+        self.column_aliases: dict[str, AliasInfo] = {}  # Track column aliases and their definitions
         self.current_query_level = 0  # Track nesting level for subqueries
 
     def __call__(self, node):
@@ -81,7 +89,7 @@ class ColumnCollector(Visitor):
 
             # Collect tables and aliases
             alias_visitor = TableAliasVisitor()
-            if hasattr(node, "fromClause") and node.fromClause:
+            if node.fromClause:
                 for from_item in node.fromClause:
                     alias_visitor(from_item)
             scope_tables = alias_visitor.tables
@@ -91,18 +99,13 @@ class ColumnCollector(Visitor):
             self.context_stack.append((scope_tables, scope_aliases))
 
             # First pass: collect column aliases from targetList
-            if hasattr(node, "targetList") and node.targetList:
+            if node.targetList:
                 self.target_list = node.targetList
                 for target_entry in self.target_list:
-                    if hasattr(target_entry, "name") and target_entry.name:
-                        # This is a column alias
-                        col_alias = target_entry.name
-                        # Store the expression node for this alias
-                        if hasattr(target_entry, "val"):
-                            self.column_aliases[col_alias] = {
-                                "node": target_entry.val,
-                                "level": query_level,
-                            }
+                    # A named target entry is a column alias; store its expression node
+                    col_alias = target_entry.name
+                    if col_alias:
+                        self.column_aliases[col_alias] = AliasInfo(node=target_entry.val, level=query_level)
 
             # Second pass: process the rest of the query
             self._process_query_clauses(node)
@@ -165,8 +168,8 @@ class ColumnCollector(Visitor):
                 if col_name in self.column_aliases:
                     # Process the original expression instead
                     alias_info = self.column_aliases[col_name]
-                    if alias_info["level"] == self.current_query_level:
-                        self(alias_info["node"])
+                    if alias_info.level == self.current_query_level:
+                        self(alias_info.node)
                         return
 
         # Regular processing for non-alias sort items
@@ -1,4 +1,5 @@
 from dataclasses import dataclass
+from functools import cached_property
 from typing import Any
 
 
@@ -10,6 +11,20 @@ class IndexDefinition:
     columns: tuple[str, ...]
     using: str = "btree"
 
+    # Configurations are frozensets of definitions used as cache keys, so hash the fields once
+    @cached_property
+    def _hash(self) -> int:
+        return hash((self.table, self.columns, self.using))
+
+    def __hash__(self) -> int:
+        return self._hash
+
+    def __getstate__(self) -> dict[str, Any]:
+        # String hashes differ between processes, so don't pickle the cached hash
+        state = self.__dict__.copy()
+        state.pop("_hash", None)
+        return state
+
     def to_dict(self) -> dict[str, Any]:
         return {
             "table": self.table,
@@ -18,11 +33,11 @@ class IndexDefinition:
             "definition": self.definition,
         }
 
-    @property
+    @cached_property
     def definition(self) -> str:
         return f"CREATE INDEX {self.name} ON {self.table} USING {self.using} ({', '.join(self.columns)})"
 
-    @property
+    @cached_property
     def name(self) -> str:
         # Clean column names for use in index naming
         # Replace special characters with underscores to avoid issues with
@@ -0,0 +1,65 @@
+"""Unit tests for VacuumHealthCalc transaction ID wraparound reporting."""
+
+from unittest.mock import AsyncMock
+from unittest.mock import MagicMock
+
+import pytest
+
+from postgres_mcp.database_health.vacuum_health_calc import VacuumHealthCalc
+from postgres_mcp.sql import SqlDriver
+
+
+def make_calc(rows):
+    driver = MagicMock()
+    driver.execute_query = AsyncMock(return_value=[SqlDriver.RowResult(cells=row) for row in rows] if rows is not None else None)
+    return VacuumHealthCalc(driver, threshold=10_000_000, max_value=2_146_483_648), driver
+
+
+@pytest.mark.asyncio
+async def test_transaction_id_danger_report():
+    """Rows from the wraparound query are reported in query order with the threshold."""
+    calc, driver = make_calc(
+        [
+            {"schema": "public", "table": "events", "transactions_left": 1_500_000},
+            {"schema": "audit", "table": "log", "transactions_left": 9_999_999},
+        ]
+    )
+
+    report = await calc.transaction_id_danger_check()
+
+    assert report == (
+        "Tables approaching transaction ID wraparound:\n"
+        "Table 'public.events' has 1,500,000 transactions remaining before wraparound (threshold: 10,000,000)\n"
+        "Table 'audit.log' has 9,999,999 transactions remaining before wraparound (threshold: 10,000,000)"
+    )
+
+    # Filtering and ordering happen in SQL, with the max value and threshold bound into the query
+    query = driver.execute_query.call_args[0][0]
+    assert "2146483648 - GREATEST" in query
+    assert "WHERE transactions_left < 10000000" in query
+    assert "ORDER BY 3, 1, 2" in query
+
+
+@pytest.mark.asyncio
+async def test_transaction_id_metrics_is_healthy():
+    """Metrics keep the is_healthy flag relative to the threshold."""
+    calc, _ = make_calc(
+        [
+            {"schema": "public", "table": "events", "transactions_left": 1_500_000},
+            {"schema": "public", "table": "users", "transactions_left": 10_000_000},
+        ]
+    )
+
+    metrics = await calc._get_transaction_id_metrics()  # type: ignore
+
+    assert [(m.table, m.is_healthy) for m in metrics] == [("events", False), ("users", True)]
+
+
+@pytest.mark.asyncio
+async def test_transaction_id_danger_healthy_tables():
+    """Healthy and empty results produce the same messages as before."""
+    calc, _ = make_calc([{"schema": "public", "table": "users", "transactions_left": 20_000_000}])
+    assert await calc.transaction_id_danger_check() == "All tables have healthy transaction ID age."
+
+    calc, _ = make_calc(None)
+    assert await calc.transaction_id_danger_check() == "No tables found with transaction ID wraparound danger."
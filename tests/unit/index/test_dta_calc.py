@@ -1,4 +1,5 @@
 import asyncio
+import contextlib
 import json
 from logging import getLogger
 from typing import Any
@@ -17,6 +18,10 @@ from postgres_mcp.index.dta_calc import ColumnCollector
 from postgres_mcp.index.dta_calc import ConditionColumnCollector
 from postgres_mcp.index.dta_calc import DatabaseTuningAdvisor
 from postgres_mcp.index.dta_calc import IndexRecommendation
+from postgres_mcp.index.index_opt_base import MAX_CONCURRENT_EXPLAINS
+from postgres_mcp.index.index_opt_base import candidate_str
+from postgres_mcp.index.presentation import TextPresentation
+from postgres_mcp.sql import IndexDefinition
 
 logger = getLogger(__name__)
 
@@ -201,6 +206,8 @@ async def test_analyze_workload(async_sql_driver, create_dta):
                     }
                 ),
             ]
+        elif "GROUP BY tablename, attname" in query:
+            return [MockCell({"tablename": "users", "attname": "id", "total_width": 10, "total_distinct": 100})]  # Prefetched index sizes
         elif "pg_stats" in query:
             return [MockCell({"total_width": 10, "total_distinct": 100})]  # For index size estimation
         elif "pg_extension" in query:
@@ -243,6 +250,22 @@ async def test_error_handling(async_sql_driver, create_dta):
     assert columns == {}
 
 
+@pytest.mark.asyncio
+async def test_get_workload_from_file(create_dta, tmp_path):
+    """Test that semicolons inside literals don't split queries loaded from a file."""
+    dta = create_dta
+    sql_file = tmp_path / "workload.sql"
+    sql_file.write_text("SELECT * FROM users WHERE name = 'a;b';\n\nSELECT * FROM orders WHERE user_id = 1;\n")
+
+    workload = dta._get_workload_from_file(str(sql_file))
+
+    assert [q["query"] for q in workload] == [
+        "SELECT * FROM users WHERE name = 'a;b'",
+        "SELECT * FROM orders WHERE user_id = 1",
+    ]
+    assert [q["queryid"] for q in workload] == [0, 1]
+
+
 @pytest.mark.asyncio
 async def test_index_exists(create_dta):
     """Test the robust index comparison functionality."""
@@ -334,6 +357,21 @@ async def test_index_exists(create_dta):
             )
 
 
+@pytest.mark.asyncio
+async def test_index_exists_parses_existing_definitions_once(create_dta):
+    """Test that existing index definitions are parsed once across candidates."""
+    dta = create_dta
+    existing_defs = {"CREATE INDEX users_name_idx ON users USING btree (name)"}
+
+    with patch.object(dta, "_extract_index_info", wraps=dta._extract_index_info) as extract:
+        assert dta._index_exists(IndexRecommendation("users", ("name",)), existing_defs)
+        assert not dta._index_exists(IndexRecommendation("users", ("email",)), existing_defs)
+        assert not dta._index_exists(IndexRecommendation("orders", ("name",)), existing_defs)
+
+    # One extraction per candidate plus a single one for the existing definition
+    assert extract.call_count == 4
+
+
 @pytest.mark.asyncio
 async def test_ndistinct_handling(create_dta):
     """Test handling of ndistinct values in row estimation calculations."""
@@ -366,6 +404,35 @@ async def test_ndistinct_handling(create_dta):
         assert result == case["expected"], f"Failed for n_distinct={case['stats']['total_distinct']}. Expected: {case['expected']}, Got: {result}"
 
 
+@pytest.mark.asyncio
+async def test_prefetch_index_sizes(async_sql_driver, create_dta):
+    """Test that index size estimates are prefetched with a single pg_stats query."""
+    dta = create_dta
+    async_sql_driver.execute_query = AsyncMock(
+        return_value=[
+            MockCell({"tablename": "users", "attname": "name", "total_width": 10, "total_distinct": 5}),
+            MockCell({"tablename": "users", "attname": "email", "total_width": 20, "total_distinct": 3}),
+        ]
+    )
+
+    await dta._prefetch_index_sizes(
+        [
+            IndexRecommendation(table="users", columns=("name",)),
+            IndexRecommendation(table="users", columns=("name", "email")),
+            IndexRecommendation(table="orders", columns=("user_id",)),
+        ]
+    )
+
+    assert async_sql_driver.execute_query.call_count == 1
+    assert dta._size_estimate_cache[("users", frozenset(["name"]))] == 180  # 18 * 5 * 2
+    assert dta._size_estimate_cache[("users", frozenset(["name", "email"]))] == 608  # 38 * 8 * 2
+    assert dta._size_estimate_cache[("orders", frozenset(["user_id"]))] == 16  # no stats: 8 * 1 * 2
+
+    # Cached sizes are served without another query
+    assert await dta._estimate_index_size("users", ["email", "name"]) == 608
+    assert async_sql_driver.execute_query.call_count == 1
+
+
 @pytest.mark.asyncio
 async def test_filter_long_text_columns(async_sql_driver, create_dta):
     """Test filtering of long text columns from index candidates."""
@@ -473,102 +540,67 @@ async def test_basic_workload_analysis(async_sql_driver):
         {"query": "SELECT * FROM users WHERE name = 'Alice'", "calls": 100},
         {"query": "SELECT * FROM orders WHERE user_id = 123", "calls": 50},
     ]
-    global responses
-    responses = [
-        # check if hypopg is enabled
-        [MockCell({"hypopg_enabled_result": 1})],
-        # check last analyze
-        [MockCell({"last_analyze": "2024-01-01 00:00:00"})],
-        # pg_stat_statements
-        [
-            MockCell(
-                {
-                    "queryid": 1,
-                    "query": workload[0]["query"],
-                    "calls": 100,
-                    "avg_exec_time": 10.0,
-                }
-            ),
-            MockCell(
-                {
-                    "queryid": 2,
-                    "query": workload[1]["query"],
-                    "calls": 50,
-                    "avg_exec_time": 5.0,
-                }
-            ),
-        ],
-        # pg_indexes
-        [],
-        # information_schema.columns
-        [
-            MockCell(
-                {
-                    "table_name": "users",
-                    "column_name": "name",
-                    "data_type": "character varying",
-                    "character_maximum_length": 150,
-                    "avg_width": 30,
-                    "potential_long_text": True,
-                }
-            ),
-            MockCell(
-                {
-                    "table_name": "orders",
-                    "column_name": "user_id",
-                    "data_type": "integer",
-                    "character_maximum_length": None,
-                    "avg_width": 4,
-                    "potential_long_text": False,
-                }
-            ),
-        ],
-        # hypopg_create_index (for users.name, orders.user_id)
-        [MockCell({"indexrelid": 1554}), MockCell({"indexrelid": 1555})],
-        # hypopg_list_indexes
-        [
-            MockCell({"index_name": "crystaldba_idx_users_name_1", "index_size": 8000}),
-            MockCell(
-                {
-                    "index_name": "crystaldba_idx_orders_user_id_1",
-                    "index_size": 4000,
-                }
-            ),
-        ],
-        # hypopg_reset
-        [],
-        # EXPLAIN without indexes
-        [MockCell({"QUERY PLAN": [{"Plan": {"Total Cost": 100.0}}]})],  # users.name
-        [MockCell({"QUERY PLAN": [{"Plan": {"Total Cost": 150.0}}]})],  # orders.user_id
-        [MockCell({"rel_size": 10000})],  # users table size
-        [MockCell({"rel_size": 10000})],  # orders table size
-        # pg_stats for size (users.name, orders.user_id)
-        [MockCell({"total_width": 10, "total_distinct": 100})],
-        # EXPLAIN with users.name index
-        [MockCell({"QUERY PLAN": [{"Plan": {"Total Cost": 50.0}}]})],  # users.name
-        [MockCell({"QUERY PLAN": [{"Plan": {"Total Cost": 150.0}}]})],  # orders.user_id
-        [MockCell({"total_width": 8, "total_distinct": 50})],
-        # EXPLAIN without orders.user_id index
-        [MockCell({"QUERY PLAN": [{"Plan": {"Total Cost": 100.0}}]})],  # users.name
-        [MockCell({"QUERY PLAN": [{"Plan": {"Total Cost": 75.0}}]})],  # orders.user_id
-        # EXPLAIN with users.name and orders.user_id indexes
-        [MockCell({"QUERY PLAN": [{"Plan": {"Total Cost": 50.0}}]})],  # users.name
-        [MockCell({"QUERY PLAN": [{"Plan": {"Total Cost": 75.0}}]})],  # orders.user_id
-        # hypopg_reset (final cleanup)
-        [],
-    ]
-    global responses_index
-    responses_index = 0
+    # EXPLAIN costs per query without and with the index on its own table; the cost of a
+    # query depends only on the hypothetical indexes created for it, not on the order in
+    # which configurations are explained
+    explain_costs = {
+        "select * from users where name = 'alice'": ("crystaldba_idx_users_name_1", 100.0, 40.0),
+        "select * from orders where user_id = 123": ("crystaldba_idx_orders_user_id_1", 150.0, 15.0),
+    }
 
     async def mock_execute_query(query, *args, **kwargs):
-        global responses_index
-        responses_index += 1
-        logger.info(
-            f"Query: {query}\n    Response: {
-                list(json.dumps(x.cells) for x in responses[responses_index - 1]) if responses_index <= len(responses) else None
-            }\n--------------------------------------------------------"
-        )
-        return responses[responses_index - 1] if responses_index <= len(responses) else None
+        if "EXPLAIN" in query:
+            for query_text, (index_name, base_cost, indexed_cost) in explain_costs.items():
+                if query.endswith(query_text):
+                    cost = indexed_cost if index_name in query else base_cost
+                    return [MockCell({"QUERY PLAN": [{"Plan": {"Total Cost": cost}}]})]
+            raise AssertionError(f"Unexpected EXPLAIN: {query}")
+        if "pg_extension" in query:
+            return [MockCell({"extversion": "1.4.0"})]
+        if "last_analyze" in query:
+            return [MockCell({"last_analyze": "2024-01-01 00:00:00"})]
+        if "pg_stat_statements" in query:
+            return [
+                MockCell({"queryid": 1, "query": workload[0]["query"], "calls": 100, "avg_exec_time": 10.0}),
+                MockCell({"queryid": 2, "query": workload[1]["query"], "calls": 50, "avg_exec_time": 5.0}),
+            ]
+        if "information_schema.columns" in query:
+            return [
+                MockCell(
+                    {
+                        "table_name": "users",
+                        "column_name": "name",
+                        "data_type": "character varying",
+                        "character_maximum_length": 150,
+                        "avg_width": 30,
+                        "potential_long_text": True,
+                    }
+                ),
+                MockCell(
+                    {
+                        "table_name": "orders",
+                        "column_name": "user_id",
+                        "data_type": "integer",
+                        "character_maximum_length": None,
+                        "avg_width": 4,
+                        "potential_long_text": False,
+                    }
+                ),
+            ]
+        if "hypopg_list_indexes" in query:
+            return [
+                MockCell({"index_name": "crystaldba_idx_users_name_1", "index_size": 8000}),
+                MockCell({"index_name": "crystaldba_idx_orders_user_id_1", "index_size": 4000}),
+            ]
+        if "pg_total_relation_size" in query:
+            return [MockCell({"rel_size": 10000})]
+        if "pg_stats" in query:
+            return [
+                MockCell({"tablename": "users", "attname": "name", "total_width": 10, "total_distinct": 100}),
+                MockCell({"tablename": "orders", "attname": "user_id", "total_width": 8, "total_distinct": 50}),
+            ]
+        # pg_indexes, hypopg_create_index and hypopg_reset
+        return []
 
     async_sql_driver.execute_query = AsyncMock(side_effect=mock_execute_query)
 
@@ -580,6 +612,48 @@ async def test_basic_workload_analysis(async_sql_driver):
     assert any(r.table == "orders" and "user_id" in r.columns for r in session.recommendations)
 
 
+@pytest.mark.asyncio
+async def test_validate_workload_bounds_parameter_replacement(create_dta):
+    """Parameter replacement for a large workload holds no more than the explain semaphore allows."""
+    dta = create_dta
+    running = 0
+    max_running = 0
+
+    async def mock_replace_parameters(query):
+        nonlocal running, max_running
+        running += 1
+        max_running = max(max_running, running)
+        await asyncio.sleep(0)
+        running -= 1
+        return query
+
+    dta._sql_bind_params.replace_parameters = AsyncMock(side_effect=mock_replace_parameters)
+
+    workload = [{"query": f"SELECT * FROM users WHERE id = {i}", "calls": 1} for i in range(3 * MAX_CONCURRENT_EXPLAINS)]
+    validated = await dta._validate_and_parse_workload(workload)
+
+    assert [q["query"] for q in validated] == [f"select * from users where id = {i}" for i in range(3 * MAX_CONCURRENT_EXPLAINS)]
+    assert max_running == MAX_CONCURRENT_EXPLAINS
+
+
+@pytest.mark.parametrize("collect_traces", [True, False])
+@pytest.mark.asyncio
+async def test_collect_traces(async_sql_driver, collect_traces):
+    """Traces are only collected and returned with the results when the advisor is created to collect them."""
+    dta = DatabaseTuningAdvisor(sql_driver=async_sql_driver, collect_traces=collect_traces)
+    dta._run_prechecks = AsyncMock(return_value=None)  # type: ignore
+    dta._generate_recommendations = AsyncMock(return_value=(set(), 100.0))  # type: ignore
+
+    result = await TextPresentation(async_sql_driver, dta).analyze_queries(["SELECT * FROM users WHERE id = 1"])
+
+    assert result["recommendations"] == "No index recommendations found."
+    if collect_traces:
+        assert any(trace.startswith("Workload queries (1)") for trace in result["_langfuse_trace"])
+    else:
+        assert "_langfuse_trace" not in result
+        assert dta._dta_traces == []  # type: ignore
+
+
 @pytest.mark.asyncio
 async def test_replace_parameters_basic(create_dta):
     """Test basic parameter replacement functionality."""
@@ -969,39 +1043,48 @@ async def test_complex_query_with_alias_in_conditions(async_sql_driver):
 
 
 @pytest.mark.asyncio
-async def test_filter_candidates_by_query_conditions(async_sql_driver, create_dta):
-    """Test filtering index candidates based on query conditions."""
+async def test_generate_candidates_uses_condition_columns(async_sql_driver, create_dta):
+    """Test that candidates only combine columns used in query conditions."""
     dta = create_dta
 
-    # Mock the sql_driver for _column_exists
-    async_sql_driver.execute_query.return_value = [MockCell({"1": 1})]
+    # Column types without long text; no existing indexes or hypothetical index sizes
+    async def mock_execute_query(query):
+        if "information_schema.columns" in query:
+            return [
+                MockCell(
+                    {
+                        "table_name": table,
+                        "column_name": column,
+                        "data_type": "integer",
+                        "character_maximum_length": None,
+                        "avg_width": 4,
+                        "potential_long_text": False,
+                    }
+                )
+                for table, column in [("users", "name"), ("users", "age"), ("orders", "status"), ("orders", "total")]
+            ]
+        return []
 
-    # Create test queries
-    q1 = "SELECT * FROM users WHERE name = 'Alice' AND age > 25"
-    q2 = "SELECT * FROM orders WHERE status = 'pending' AND total > 100"
+    async_sql_driver.execute_query = AsyncMock(side_effect=mock_execute_query)
+
+    # Create test queries; email and order_date are selected but not used in conditions
+    q1 = "SELECT name, email FROM users WHERE name = 'Alice' AND age > 25"
+    q2 = "SELECT order_date FROM orders WHERE status = 'pending' AND total > 100"
     queries = [(q1, parse_sql(q1)[0].stmt, 1.0), (q2, parse_sql(q2)[0].stmt, 1.0)]
 
-    # Create test candidates (some with columns not in conditions)
-    candidates = [
-        IndexRecommendation("users", ("name",)),
-        IndexRecommendation("users", ("name", "email")),  # email not in conditions
-        IndexRecommendation("users", ("age",)),
-        IndexRecommendation("orders", ("status", "total")),
-        IndexRecommendation("orders", ("order_date",)),  # order_date not in conditions
-    ]
+    assert dta._get_condition_columns(queries) == {"users": {"name", "age"}, "orders": {"status", "total"}}
 
-    # Execute the filter
-    filtered = dta._filter_candidates_by_query_conditions(queries, candidates)
+    candidates = await dta.generate_candidates(queries, set())
 
     # Check results
-    filtered_tables_columns = [(c.table, c.columns) for c in filtered]
-    assert ("users", ("name",)) in filtered_tables_columns
-    assert ("users", ("age",)) in filtered_tables_columns
-    assert ("orders", ("status", "total")) in filtered_tables_columns
+    candidate_tables_columns = {(c.table, frozenset(c.columns)) for c in candidates}
+    assert ("users", frozenset({"name"})) in candidate_tables_columns
+    assert ("users", frozenset({"age"})) in candidate_tables_columns
+    assert ("users", frozenset({"name", "age"})) in candidate_tables_columns
+    assert ("orders", frozenset({"status", "total"})) in candidate_tables_columns
 
-    # These shouldn't be in the filtered list
-    assert ("users", ("name", "email")) not in filtered_tables_columns
-    assert ("orders", ("order_date",)) not in filtered_tables_columns
+    # Columns outside of conditions are never part of a candidate
+    assert all("email" not in c.columns and "order_date" not in c.columns for c in candidates)
 
 
 @pytest.mark.asyncio
@@ -1190,6 +1273,189 @@ async def test_enumerate_greedy_pareto_cost_benefit(async_sql_driver):
     assert len(final_indexes_higher_threshold) == 1
 
 
+@pytest.mark.asyncio
+async def test_enumerate_greedy_concurrent_scoring_matches_sequential(async_sql_driver):
+    """Concurrent candidate scoring selects the same indexes as sequential scoring, with traces in candidate order."""
+    benefits = {f"col{i}": benefit for i, benefit in enumerate([300, 200, 100, 20, 5])}
+
+    q1 = "SELECT * FROM test_table WHERE col1 = 1"
+    queries = [(q1, parse_sql(q1)[0].stmt, 1.0)]
+
+    async def run_greedy(sequential: bool):
+        dta = DatabaseTuningAdvisor(sql_driver=async_sql_driver, budget_mb=1000, max_runtime_seconds=120)
+        dta._check_time = MagicMock(return_value=False)  # type: ignore
+        dta._estimate_index_size = AsyncMock(return_value=1024 * 1024)  # type: ignore
+        dta._get_table_size = AsyncMock(return_value=50 * 1024 * 1024)  # type: ignore
+        dta.min_time_improvement = 0.01
+        lock = asyncio.Lock()
+        candidate_indexes = {IndexRecommendation(table="test_table", columns=(f"col{i}",)) for i in range(5)}
+        candidate_order = [idx.index_definition for idx in candidate_indexes]
+
+        async def mock_evaluate_cost(queries, config):
+            # Candidates later in the evaluation order finish first when scored concurrently
+            async with lock if sequential else contextlib.nullcontext():
+                await asyncio.sleep(0.001 * (len(candidate_order) - max(candidate_order.index(idx) for idx in config)))
+                dta.dta_trace(f"  - Evaluating cost for configuration: {candidate_str(config)}")
+                return 1000.0 - sum(benefits[idx.columns[0]] for idx in config)
+
+        dta._evaluate_configuration_cost = AsyncMock(side_effect=mock_evaluate_cost)  # type: ignore
+        final_indexes, final_cost = await dta._enumerate_greedy(queries, set(), 1000.0, candidate_indexes)  # type: ignore
+        return final_indexes, final_cost, dta._dta_traces, candidate_order  # type: ignore
+
+    concurrent_indexes, concurrent_cost, concurrent_traces, candidate_order = await run_greedy(sequential=False)
+    sequential_indexes, sequential_cost, sequential_traces, _ = await run_greedy(sequential=True)
+
+    assert {idx.index_definition for idx in concurrent_indexes} == {idx.index_definition for idx in sequential_indexes}
+    assert {idx.columns[0] for idx in concurrent_indexes} == {"col0", "col1", "col2", "col3"}
+    assert concurrent_cost == sequential_cost == 380.0
+    assert concurrent_traces == sequential_traces
+
+    # Candidates of the first iteration are traced in evaluation order, not completion order, and the
+    # traces of each candidate's cost evaluation follow its own index size and total space
+    first_iteration = concurrent_traces[: concurrent_traces.index("\n[ITERATION 2] Evaluating candidates")]
+    evaluated = [i for i, trace in enumerate(first_iteration) if trace.startswith("Evaluating candidate:")]
+    assert [first_iteration[i] for i in evaluated] == [f"Evaluating candidate: {candidate_str([idx])}" for idx in candidate_order]
+    assert [first_iteration[i + 3] for i in evaluated] == [
+        f"  - Evaluating cost for configuration: {candidate_str([idx])}" for idx in candidate_order
+    ]
+
+
+@pytest.mark.asyncio
+async def test_evaluate_query_cost_narrows_indexes_to_query_tables(async_sql_driver, create_dta):
+    """Queries are explained with indexes on the tables they read; views and unresolved relations keep the whole configuration."""
+    dta = create_dta
+
+    async def mock_execute_query(query):
+        if "pg_class" in query:
+            return [
+                MockCell({"relname": "users", "relkind": "r"}),
+                MockCell({"relname": "orders", "relkind": "r"}),
+                MockCell({"relname": "active_users", "relkind": "v"}),
+            ]
+        return []
+
+    async_sql_driver.execute_query = AsyncMock(side_effect=mock_execute_query)
+
+    explained = {}
+
+    async def mock_explain(query_text, indexes):
+        explained[query_text] = indexes
+        return {"Plan": {"Total Cost": 10.0}}
+
+    dta.get_explain_plan_with_indexes = AsyncMock(side_effect=mock_explain)  # type: ignore
+
+    users_query = "select * from users where name = 'alice'"
+    orders_query = "select * from orders where user_id = 1"
+    view_query = "select * from active_users where name = 'alice'"
+    cte_query = "with recent as (select * from orders) select * from recent where user_id = 1"
+    workload = [(q, parse_sql(q)[0].stmt, 1.0) for q in (users_query, orders_query, view_query, cte_query)]
+
+    users_index = IndexRecommendation(table="public.users", columns=("name",)).index_definition
+    orders_index = IndexRecommendation(table="orders", columns=("user_id",)).index_definition
+    config = frozenset({users_index, orders_index})
+
+    await dta._evaluate_configuration_cost(workload, config)
+
+    # Schema-qualified index tables match the bare relation names in the query
+    assert explained[users_query] == frozenset({users_index})
+    assert explained[orders_query] == frozenset({orders_index})
+    # A view may read from any table, and the CTE name is not in the catalog
+    assert explained[view_query] == config
+    assert explained[cte_query] == config
+
+    # Relation kinds are looked up once per analysis
+    await dta._evaluate_configuration_cost(workload, frozenset({orders_index}))
+    assert sum("pg_class" in call.args[0] for call in async_sql_driver.execute_query.call_args_list) == 1
+
+
+@pytest.mark.asyncio
+async def test_enumerate_greedy_selects_complementary_indexes(async_sql_driver):
+    """An index that only helps next to another one is still scored and selected in later iterations."""
+    dta = DatabaseTuningAdvisor(sql_driver=async_sql_driver, budget_mb=1000, max_runtime_seconds=120)
+    dta._check_time = MagicMock(return_value=False)  # type: ignore
+    dta._estimate_index_size = AsyncMock(return_value=1024)  # type: ignore
+    dta._get_table_size = AsyncMock(return_value=50 * 1024 * 1024)  # type: ignore
+    dta.min_time_improvement = 0.05
+
+    q1 = "SELECT * FROM users u JOIN orders o ON o.user_id = u.id WHERE u.name = 'Alice'"
+    queries = [(q1, parse_sql(q1)[0].stmt, 1.0)]
+    users_name = IndexRecommendation(table="users", columns=("name",))
+    orders_user_id = IndexRecommendation(table="orders", columns=("user_id",))
+    candidate_indexes = {users_name, orders_user_id}
+
+    # orders.user_id is useless on its own, but enables a nested-loop join once users.name is indexed
+    costs = {
+        frozenset(): 1000.0,
+        frozenset({users_name.index_definition}): 700.0,
+        frozenset({orders_user_id.index_definition}): 1000.0,
+        frozenset({users_name.index_definition, orders_user_id.index_definition}): 100.0,
+    }
+
+    evaluated = []
+
+    async def mock_evaluate_cost(queries, config):
+        evaluated.append(config)
+        return costs[config]
+
+    dta._evaluate_configuration_cost = AsyncMock(side_effect=mock_evaluate_cost)  # type: ignore
+    final_indexes, final_cost = await dta._enumerate_greedy(queries, set(), 1000.0, candidate_indexes)  # type: ignore
+
+    # orders.user_id is scored on its own, then again next to users.name
+    assert [config for config in evaluated if orders_user_id.index_definition in config] == [
+        frozenset({orders_user_id.index_definition}),
+        frozenset({users_name.index_definition, orders_user_id.index_definition}),
+    ]
+
+    # A greedy search that scores every remaining candidate in every iteration selects the same indexes
+    selected: frozenset[IndexDefinition] = frozenset()
+    remaining = {users_name.index_definition, orders_user_id.index_definition}
+    while remaining:
+        best = min(remaining, key=lambda idx: costs[selected | {idx}])
+        if (costs[selected] - costs[selected | {best}]) / costs[selected] < dta.min_time_improvement:
+            break
+        selected |= {best}
+        remaining.discard(best)
+
+    assert {idx.index_definition for idx in final_indexes} == selected == {users_name.index_definition, orders_user_id.index_definition}
+    assert final_cost == costs[selected] == 100.0
+
+
+@pytest.mark.asyncio
+async def test_enumerate_greedy_drops_over_budget_candidates(async_sql_driver):
+    """A candidate that no longer fits in the budget is not evaluated again."""
+    dta = DatabaseTuningAdvisor(sql_driver=async_sql_driver, budget_mb=1, max_runtime_seconds=120)
+    dta._check_time = MagicMock(return_value=False)  # type: ignore
+    dta._get_table_size = AsyncMock(return_value=50 * 1024 * 1024)  # type: ignore
+    dta.min_time_improvement = 0.05
+
+    q1 = "SELECT * FROM test_table WHERE col0 = 1"
+    queries = [(q1, parse_sql(q1)[0].stmt, 1.0)]
+    candidate_indexes = {IndexRecommendation(table="test_table", columns=(col,)) for col in ("col0", "col1", "col2", "col3")}
+
+    # col2 fits in the budget on its own, but not next to col0
+    sizes = {"col0": 512 * 1024, "col1": 256 * 1024, "col2": 900 * 1024, "col3": 1024}
+    benefits = {"col0": 500.0, "col1": 300.0, "col2": 400.0, "col3": 150.0}
+
+    async def mock_index_size(table, columns):
+        return sizes[columns[0]]
+
+    async def mock_evaluate_cost(queries, config):
+        return 1000.0 - sum(benefits[idx.columns[0]] for idx in config)
+
+    dta._estimate_index_size = AsyncMock(side_effect=mock_index_size)  # type: ignore
+    dta._evaluate_configuration_cost = AsyncMock(side_effect=mock_evaluate_cost)  # type: ignore
+    final_indexes, final_cost = await dta._enumerate_greedy(queries, set(), 1000.0, candidate_indexes)  # type: ignore
+
+    assert {idx.columns[0] for idx in final_indexes} == {"col0", "col1", "col3"}
+    assert final_cost == 50.0
+
+    # col2 is scored in the first iteration, skipped for the budget in the second, and never again
+    traces = dta._dta_traces  # type: ignore
+    assert traces.count("Evaluating candidate: test_table(col2)") == 2
+    assert traces.count("Evaluating candidate: test_table(col3)") == 3
+    assert all(idx.columns[0] != "col2" for idx in candidate_indexes)
+
+
 def test_explain_plan_diff():
     """Test the explain plan diff functionality."""
     # Create a before plan with sequential scan
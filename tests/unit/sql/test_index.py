@@ -0,0 +1,34 @@
+"""Unit tests for IndexDefinition hashing."""
+
+import pickle
+from dataclasses import asdict
+from dataclasses import fields
+
+from postgres_mcp.sql import IndexDefinition
+
+
+def test_hash_is_not_a_field():
+    """The cached hash stays out of the dataclass fields, asdict and pickles."""
+    index = IndexDefinition(table="users", columns=("name", "email"))
+    hash(index)
+
+    assert [f.name for f in fields(index)] == ["table", "columns", "using"]
+    assert asdict(index) == {"table": "users", "columns": ("name", "email"), "using": "btree"}
+    assert "_hash" not in index.__getstate__()
+
+
+def test_hash_and_equality():
+    """Equal definitions hash alike, including after a pickle round trip."""
+    index = IndexDefinition(table="users", columns=("name",))
+    same = IndexDefinition(table="users", columns=("name",))
+    other = IndexDefinition(table="users", columns=("name",), using="hash")
+
+    assert index == same
+    assert hash(index) == hash(same) == hash(("users", ("name",), "btree"))
+    assert index != other
+
+    restored = pickle.loads(pickle.dumps(index))
+    assert restored == index
+    assert hash(restored) == hash(index)
+    assert restored.definition == "CREATE INDEX crystaldba_idx_users_name_1 ON users USING btree (name)"
+    assert {index, same, other, restored} == {index, other}
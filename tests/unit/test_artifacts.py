@@ -0,0 +1,146 @@
+"""Golden-output tests for explain plan formatting and plan diffs."""
+
+import copy
+
+import pytest
+
+from postgres_mcp.artifacts import ExplainPlanArtifact
+
+
+@pytest.fixture
+def before_plan():
+    return {
+        "Plan": {
+            "Node Type": "Hash Join",
+            "Total Cost": 1250.5,
+            "Startup Cost": 30.0,
+            "Plan Rows": 500,
+            "Plan Width": 64,
+            "Actual Total Time": 12.345,
+            "Actual Startup Time": 1.5,
+            "Actual Rows": 480,
+            "Actual Loops": 1,
+            "Plans": [
+                {
+                    "Node Type": "Seq Scan",
+                    "Relation Name": "orders",
+                    "Total Cost": 900.0,
+                    "Startup Cost": 0.0,
+                    "Plan Rows": 10000,
+                    "Plan Width": 32,
+                    "Filter": "((status)::text = 'pending'::text) AND (created_at > '2024-01-01 00:00:00'::timestamp without time zone) "
+                    "AND (total > 100)",
+                },
+                {
+                    "Node Type": "Hash",
+                    "Total Cost": 25.0,
+                    "Startup Cost": 25.0,
+                    "Plan Rows": 1000,
+                    "Plan Width": 32,
+                    "Plans": [
+                        {
+                            "Node Type": "Seq Scan",
+                            "Relation Name": "users",
+                            "Total Cost": 20.0,
+                            "Startup Cost": 0.0,
+                            "Plan Rows": 1000,
+                            "Plan Width": 32,
+                            "Filter": "(active IS TRUE)",
+                        }
+                    ],
+                },
+            ],
+        },
+        "Planning Time": 0.25,
+        "Execution Time": 13.0,
+    }
+
+
+@pytest.fixture
+def after_plan(before_plan):
+    plan = copy.deepcopy(before_plan)
+    plan["Plan"]["Total Cost"] = 125.25
+    plan["Plan"]["Plans"][0] = {
+        "Node Type": "Index Scan",
+        "Relation Name": "orders",
+        "Total Cost": 80.0,
+        "Startup Cost": 0.29,
+        "Plan Rows": 500,
+        "Plan Width": 32,
+        "Filter": "(total > 100)",
+    }
+    return plan
+
+
+EXPECTED_PLAN_TEXT = (
+    "→ Hash Join (Cost: 30.00..1250.50) [Rows: 500] [Actual: 1.50..12.35 ms, Rows: 480, Loops: 1]\n"
+    "  → Seq Scan (Cost: 0.00..900.00) on orders [Rows: 10000]\n"
+    "    Filter: ((status)::text = 'pending'::text) AND (created_at > '2024-01-01 00:00:00'::timestamp without tim...\n"
+    "  → Hash (Cost: 25.00..25.00) [Rows: 1000]\n"
+    "    → Seq Scan (Cost: 0.00..20.00) on users [Rows: 1000]\n"
+    "      Filter: (active IS TRUE)"
+)
+
+
+def test_format_plan_summary(before_plan):
+    assert ExplainPlanArtifact.format_plan_summary(before_plan) == EXPECTED_PLAN_TEXT
+
+
+def test_to_text(before_plan):
+    artifact = ExplainPlanArtifact.from_json_data(before_plan)
+    assert artifact.to_text() == "Planning Time: 0.250 ms\nExecution Time: 13.000 ms\n" + EXPECTED_PLAN_TEXT
+
+
+def test_format_plan_summary_deep_plan():
+    """Plans nested deeper than the precomputed indents keep two spaces per level."""
+    plan = {"Node Type": "Result", "Total Cost": 1.0, "Startup Cost": 0.0, "Plan Rows": 1, "Plan Width": 4}
+    for _ in range(70):
+        plan = {"Node Type": "Materialize", "Total Cost": 1.0, "Startup Cost": 0.0, "Plan Rows": 1, "Plan Width": 4, "Plans": [plan]}
+
+    lines = ExplainPlanArtifact.format_plan_summary({"Plan": plan}).splitlines()
+
+    assert len(lines) == 71
+    assert lines[70] == "  " * 70 + "→ Result (Cost: 0.00..1.00) [Rows: 1]"
+    assert all(line == "  " * depth + "→ Materialize (Cost: 0.00..1.00) [Rows: 1]" for depth, line in enumerate(lines[:70]))
+
+
+def test_create_plan_diff(before_plan, after_plan):
+    assert ExplainPlanArtifact.create_plan_diff(before_plan, after_plan) == (
+        "PLAN CHANGES:\n"
+        "------------\n"
+        "Cost: 1250.50 → 125.25 (10.0x improvement)\n"
+        "\n"
+        "Operation Changes:\n"
+        "--- \n"
+        "+++ \n"
+        "@@ -1,3 +1,3 @@\n"
+        " → Hash Join\n"
+        "-  → Seq Scan on orders\n"
+        "+  → Index Scan on orders\n"
+        "   → Hash\n"
+        "\n"
+        "Major Changes:\n"
+        "- 1 sequential scans replaced with more efficient access methods\n"
+        "- 1 new index scans used"
+    )
+
+
+def test_create_plan_diff_no_changes(before_plan):
+    assert ExplainPlanArtifact.create_plan_diff(before_plan, copy.deepcopy(before_plan)) == (
+        "PLAN CHANGES:\n"
+        "------------\n"
+        "Cost: 1250.50 → 1250.50 (1.0x improvement)\n"
+        "\n"
+        "Operation Changes:\n"
+        "No structural changes detected\n"
+        "\n"
+        "Major Changes:"
+    )
+
+
+def test_format_plan_summary_reflects_plan_changes(before_plan):
+    """Formatting the same dict again after it changes shows the new contents."""
+    ExplainPlanArtifact.format_plan_summary(before_plan)
+    before_plan["Plan"]["Node Type"] = "Merge Join"
+
+    assert ExplainPlanArtifact.format_plan_summary(before_plan).startswith("→ Merge Join (Cost: 30.00..1250.50)")